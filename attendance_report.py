@@ -0,0 +1,300 @@
+"""
+Attendance Report untuk Face Recognition System
+Menghitung jam masuk pertama / keluar terakhir per orang per hari dan jumlah
+hari hadir per minggu dari log CSV, dalam satu kali baca streaming (csv module,
+tanpa memuat seluruh file ke pandas). Memori hanya sebanding dengan jumlah
+(hari x orang), bukan jumlah baris log.
+
+Hasil per hari disimpan di cache (attendance_cache.json) beserta offset byte
+terakhir yang sudah dibaca. Karena log hanya di-append, laporan berikutnya cukup
+membaca baris baru - hanya hari yang berubah yang dihitung ulang. Jika awal file
+berubah (misalnya setelah clear_old_logs), cache dibangun ulang.
+
+Usage:
+    python attendance_report.py
+    python attendance_report.py --start 2024-06-01 --end 2024-06-30 --format csv --output juni.csv
+    python attendance_report.py --weekly --format json --output mingguan.json
+    python attendance_report.py --no-cache --start 2024-06-03 --end 2024-06-07
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+from datetime import date, datetime
+
+import pytz
+
+CACHE_VERSION = 1
+HEAD_CHECKSUM_BYTES = 4096
+DAILY_FIELDS = ["Tanggal", "Hari", "Nama", "Masuk", "Keluar", "Deteksi"]
+WEEKLY_FIELDS = ["Minggu", "Nama", "Hari_Hadir", "Deteksi"]
+
+
+def _head_checksum(path, length):
+    """Checksum of the first length bytes, used to detect a rewritten log"""
+    with open(path, 'rb') as file:
+        return hashlib.sha1(file.read(length)).hexdigest()
+
+
+def _iso_week(day):
+    year, week, _ = date.fromisoformat(day).isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def _merge_detection(people, name, time_of_day):
+    """Fold one detection into the per-person [first_in, last_out, detections] of a day"""
+    entry = people.get(name)
+    if entry is None:
+        people[name] = [time_of_day, time_of_day, 1]
+        return
+    if time_of_day < entry[0]:
+        entry[0] = time_of_day
+    if time_of_day > entry[1]:
+        entry[1] = time_of_day
+    entry[2] += 1
+
+
+class AttendanceReport:
+    def __init__(self, log_file="face_detection_logs.csv", cache_path="attendance_cache.json", include_unknown=False):
+        """
+        Initialize the report engine
+
+        Args:
+            log_file (str): Detection log written by CSVLogger (Nama, Hari, Tanggal, Jam)
+            cache_path (str): Per-day aggregate cache, None to disable caching
+            include_unknown (bool): Count "Unknown" detections as a person
+        """
+        self.log_file = log_file
+        self.cache_path = cache_path
+        self.include_unknown = include_unknown
+
+        self.days = {}  # date -> {name: [first_in, last_out, detections]}
+        self.day_names = {}  # date -> day name as logged
+        self.offset = 0
+        self.head_length = 0
+        self.head_checksum = None
+        self.stats = {"rows_read": 0, "days_changed": 0, "rebuilt": False}
+
+        if cache_path:
+            self._load_cache()
+
+    def update(self):
+        """
+        Read the log rows appended since the cached offset
+
+        Returns:
+            int: Number of log rows read
+        """
+        self.stats = {"rows_read": 0, "days_changed": 0, "rebuilt": False}
+        if not os.path.exists(self.log_file):
+            return 0
+
+        size = os.path.getsize(self.log_file)
+        if not self._cache_matches(size):
+            self.days, self.day_names, self.offset = {}, {}, 0
+            self.stats["rebuilt"] = True
+
+        if size > self.offset:
+            changed = set()
+            self.offset = self._scan(self.offset, self.days, self.day_names, changed=changed)
+            self.stats["days_changed"] = len(changed)
+
+        self.head_length = min(HEAD_CHECKSUM_BYTES, self.offset)
+        self.head_checksum = _head_checksum(self.log_file, self.head_length)
+        if self.cache_path:
+            self._save_cache()
+        return self.stats["rows_read"]
+
+    def scan_range(self, start=None, end=None):
+        """
+        Cache-less single pass limited to a date range
+
+        Rows outside the range are skipped without aggregation and reading stops
+        at the first row after end (the log is appended in time order).
+        """
+        self.days, self.day_names = {}, {}
+        self.stats = {"rows_read": 0, "days_changed": 0, "rebuilt": True}
+        if os.path.exists(self.log_file):
+            self._scan(0, self.days, self.day_names, start=start, end=end)
+
+    def daily(self, start=None, end=None):
+        """
+        First-in / last-out per person per day
+
+        Returns:
+            list: Dicts with DAILY_FIELDS keys, sorted by date and name
+        """
+        rows = []
+        for day in sorted(self.days):
+            if (start and day < start) or (end and day > end):
+                continue
+            for name, (first_in, last_out, detections) in sorted(self.days[day].items()):
+                rows.append({"Tanggal": day, "Hari": self.day_names.get(day, ""), "Nama": name,
+                             "Masuk": first_in, "Keluar": last_out, "Deteksi": detections})
+        return rows
+
+    def weekly(self, start=None, end=None):
+        """
+        Days present per person per ISO week
+
+        Returns:
+            list: Dicts with WEEKLY_FIELDS keys, sorted by week and name
+        """
+        weeks = {}
+        for day, people in self.days.items():
+            if (start and day < start) or (end and day > end):
+                continue
+            week = weeks.setdefault(_iso_week(day), {})
+            for name, (_, _, detections) in people.items():
+                presence = week.setdefault(name, [0, 0])
+                presence[0] += 1
+                presence[1] += detections
+
+        return [{"Minggu": week, "Nama": name, "Hari_Hadir": days_present, "Deteksi": detections}
+                for week in sorted(weeks)
+                for name, (days_present, detections) in sorted(weeks[week].items())]
+
+    def write(self, rows, output, fmt="csv", fields=DAILY_FIELDS):
+        """Write report rows as CSV or JSON"""
+        if fmt == "json":
+            with open(output, 'w', encoding='utf-8') as file:
+                json.dump(rows, file, indent=2, ensure_ascii=False)
+        else:
+            with open(output, 'w', newline='', encoding='utf-8') as file:
+                writer = csv.DictWriter(file, fieldnames=fields)
+                writer.writeheader()
+                writer.writerows(rows)
+        print(f"💾 Laporan kehadiran disimpan ke: {output} ({len(rows)} baris)")
+
+    def _scan(self, offset, days, day_names, start=None, end=None, changed=None):
+        """
+        Stream the log from a byte offset into the per-day aggregates
+
+        Returns:
+            int: Offset after the last complete line
+        """
+        with open(self.log_file, 'rb') as file:
+            file.seek(offset)
+            for raw_line in file:
+                if not raw_line.endswith(b"\n"):
+                    break  # Line still being written, pick it up next time
+                offset += len(raw_line)
+
+                row = next(csv.reader([raw_line.decode("utf-8-sig")]), None)
+                if not row or len(row) < 4 or row[0] == "Nama":
+                    continue
+                name, day_name, day, time_of_day = row[0], row[1], row[2], row[3]
+                self.stats["rows_read"] += 1
+
+                if end and day > end:
+                    break
+                if start and day < start:
+                    continue
+                if name == "Unknown" and not self.include_unknown:
+                    continue
+
+                _merge_detection(days.setdefault(day, {}), name, time_of_day)
+                day_names[day] = day_name
+                if changed is not None:
+                    changed.add(day)
+        return offset
+
+    def _cache_matches(self, size):
+        """The cache is valid if the log only grew since it was written"""
+        if self.head_checksum is None or size < self.offset:
+            return False
+        return _head_checksum(self.log_file, self.head_length) == self.head_checksum
+
+    def _load_cache(self):
+        if not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as file:
+                cache = json.load(file)
+            if (cache.get("version") != CACHE_VERSION or cache.get("log_file") != os.path.abspath(self.log_file)
+                    or cache.get("include_unknown") != self.include_unknown):
+                return
+            self.days = cache["days"]
+            self.day_names = cache["day_names"]
+            self.offset = cache["offset"]
+            self.head_length = cache["head_length"]
+            self.head_checksum = cache["head_checksum"]
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️  Cache laporan kehadiran tidak bisa dimuat: {e}")
+
+    def _save_cache(self):
+        cache = {
+            "version": CACHE_VERSION,
+            "log_file": os.path.abspath(self.log_file),
+            "include_unknown": self.include_unknown,
+            "offset": self.offset,
+            "head_length": self.head_length,
+            "head_checksum": self.head_checksum,
+            "day_names": self.day_names,
+            "days": self.days,
+        }
+        tmp_path = self.cache_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(cache, file, ensure_ascii=False)
+        os.replace(tmp_path, self.cache_path)
+
+
+def print_attendance_summary(report, today):
+    """Print today's first-in / last-out and this week's presence (keyboard stats view)"""
+    report.update()
+    print("\n🕘 KEHADIRAN HARI INI:")
+    print("=" * 50)
+    rows = report.daily(today, today)
+    for row in rows:
+        print(f"{row['Nama']:<20} masuk {row['Masuk']}  keluar {row['Keluar']}  ({row['Deteksi']}x)")
+    if not rows:
+        print("Belum ada kehadiran hari ini")
+
+    week = _iso_week(today)
+    weekly_rows = [row for row in report.weekly() if row["Minggu"] == week]
+    if weekly_rows:
+        print(f"📅 Minggu {week}: " + ", ".join(f"{row['Nama']} {row['Hari_Hadir']} hari" for row in weekly_rows))
+    print("=" * 50)
+
+
+def main():
+    """Main function"""
+    today = datetime.now(pytz.timezone('Asia/Jakarta')).date()
+
+    parser = argparse.ArgumentParser(description="Laporan kehadiran dari log deteksi CSV")
+    parser.add_argument("--log", default="face_detection_logs.csv", help="File log CSV")
+    parser.add_argument("--start", default=today.replace(day=1).isoformat(), help="Tanggal awal (default: awal bulan ini)")
+    parser.add_argument("--end", default=today.isoformat(), help="Tanggal akhir (default: hari ini)")
+    parser.add_argument("--weekly", action="store_true", help="Laporan hari hadir per minggu")
+    parser.add_argument("--format", choices=["csv", "json"], default="csv")
+    parser.add_argument("--output", help="File output (default: tampilkan saja)")
+    parser.add_argument("--cache", default="attendance_cache.json", help="File cache per hari")
+    parser.add_argument("--no-cache", action="store_true", help="Baca hanya rentang tanggal, tanpa cache")
+    parser.add_argument("--include-unknown", action="store_true", help="Hitung deteksi 'Unknown'")
+    args = parser.parse_args()
+
+    report = AttendanceReport(args.log, None if args.no_cache else args.cache, args.include_unknown)
+    if args.no_cache:
+        report.scan_range(args.start, args.end)
+    else:
+        report.update()
+    print(f"📊 {report.stats['rows_read']} baris log dibaca, {report.stats['days_changed']} hari diperbarui"
+          f"{' (cache dibangun ulang)' if report.stats['rebuilt'] else ''}")
+
+    if args.weekly:
+        rows, fields = report.weekly(args.start, args.end), WEEKLY_FIELDS
+    else:
+        rows, fields = report.daily(args.start, args.end), DAILY_FIELDS
+
+    if args.output:
+        report.write(rows, args.output, args.format, fields)
+    else:
+        print("\n" + " | ".join(fields))
+        for row in rows:
+            print(" | ".join(str(row[field]) for field in fields))
+
+
+if __name__ == "__main__":
+    main()
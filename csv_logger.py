@@ -7,7 +7,6 @@ import csv
 import os
 from datetime import datetime
 import pytz
-import pandas as pd
 
 class CSVLogger:
     def __init__(self, log_file="face_detection_logs.csv"):
@@ -65,6 +64,9 @@ class CSVLogger:
     def get_today_logs(self):
         """Ambil log hari ini dari CSV"""
         try:
+            # pandas is only needed for analytics, import it lazily to keep start-up fast
+            import pandas as pd
+
             if not os.path.exists(self.log_file):
                 return []
             
@@ -87,6 +89,8 @@ class CSVLogger:
     def get_logs_by_date(self, date):
         """Ambil log berdasarkan tanggal tertentu (format: YYYY-MM-DD)"""
         try:
+            import pandas as pd
+
             if not os.path.exists(self.log_file):
                 return []
             
@@ -102,6 +106,8 @@ class CSVLogger:
     def get_logs_by_name(self, name):
         """Ambil semua log untuk nama tertentu"""
         try:
+            import pandas as pd
+
             if not os.path.exists(self.log_file):
                 return []
             
@@ -117,6 +123,8 @@ class CSVLogger:
     def get_summary_stats(self):
         """Dapatkan statistik ringkasan dari log"""
         try:
+            import pandas as pd
+
             if not os.path.exists(self.log_file):
                 return {}
             
@@ -145,6 +153,8 @@ class CSVLogger:
     def export_to_excel(self, filename=None):
         """Export CSV log ke Excel file"""
         try:
+            import pandas as pd
+
             if not os.path.exists(self.log_file):
                 print("❌ File CSV tidak ditemukan")
                 return False
@@ -168,6 +178,8 @@ class CSVLogger:
     def clear_old_logs(self, days=30):
         """Hapus log yang lebih lama dari jumlah hari tertentu"""
         try:
+            import pandas as pd
+
             if not os.path.exists(self.log_file):
                 return False
             
@@ -43,20 +43,21 @@ except ImportError:
     print("⚠️  Running on non-Raspberry Pi system - GPIO functions will be simulated")
 
 class DoorController:
-    def __init__(self, relay_pin=18, lock_duration=5):
+    def __init__(self, relay_pin=18, lock_duration=5, simulate=False):
         """
         Initialize door controller with Raspberry Pi 5 optimizations
         
         Args:
             relay_pin (int): GPIO pin number for relay control (default: 18)
             lock_duration (int): How long to keep door unlocked in seconds (default: 5)
+            simulate (bool): Never touch the GPIO pin, even on a Raspberry Pi (default: False)
         """
         self.relay_pin = relay_pin
         self.lock_duration = lock_duration
         self.is_unlocked = False
         self.unlock_timer = None
         
-        if RASPBERRY_PI:
+        if RASPBERRY_PI and not simulate:
             # Setup GPIO with Pi 5 specific optimizations
             try:
                 # For Raspberry Pi 5, use enhanced GPIO setup
@@ -0,0 +1,139 @@
+"""
+Event Dedup Module untuk Face Recognition System
+Menentukan apakah sebuah event deteksi perlu di-log / membuka pintu, atau
+harus ditahan karena event yang sama baru saja terjadi (cooldown).
+
+Key disimpan dalam bucket waktu sehingga key yang kadaluarsa dibuang per
+bucket (O(1) amortized per cek) dan jumlah key dibatasi. Wajah tak dikenal
+tidak lagi berbagi satu key "Unknown": key-nya adalah cluster dari
+UnknownFaceStore ("unknown:<cluster_id>"), sehingga satu orang asing tidak
+menahan log untuk orang asing lain.
+"""
+
+import time
+from collections import deque
+
+
+class EventDeduplicator:
+    def __init__(self, cooldown=30, bucket_seconds=5, max_keys=1024, clock=time.time):
+        """
+        Initialize the event deduplicator
+
+        Args:
+            cooldown (float): Seconds an event key is suppressed after being logged
+            bucket_seconds (float): Width of the expiry time buckets
+            max_keys (int): Maximum number of keys remembered (oldest evicted first)
+            clock (callable): Time source, replaceable for replay / soak runs
+        """
+        self.cooldown = cooldown
+        self.bucket_seconds = bucket_seconds
+        self.max_keys = max_keys
+        self.clock = clock
+
+        self._buckets = deque()  # (bucket_id, {key: logged_at})
+        self._key_bucket = {}  # key -> bucket_id holding its latest log time
+        self._metrics = {
+            "checks": 0,
+            "allowed": 0,
+            "suppressed": 0,
+            "expired": 0,
+            "evicted": 0,
+            "suppressed_by_kind": {},
+        }
+
+    def should_log(self, key):
+        """
+        Check an event key and record it if it passes the cooldown
+
+        Args:
+            key (str): Event key, e.g. "person:John" or "unknown:12" (cluster id)
+
+        Returns:
+            bool: True if the event should be logged, False if suppressed
+        """
+        now = self.clock()
+        self._expire(now)
+        self._metrics["checks"] += 1
+
+        bucket_id = self._key_bucket.get(key)
+        if bucket_id is not None:
+            logged_at = self._bucket(bucket_id)[key]
+            if now - logged_at < self.cooldown:
+                self._metrics["suppressed"] += 1
+                kind = key.split(":", 1)[0]
+                by_kind = self._metrics["suppressed_by_kind"]
+                by_kind[kind] = by_kind.get(kind, 0) + 1
+                return False
+            del self._bucket(bucket_id)[key]
+
+        self._record(key, now)
+        self._metrics["allowed"] += 1
+        return True
+
+    def get_metrics(self):
+        """Return suppression counters and current memory use"""
+        metrics = dict(self._metrics)
+        metrics["suppressed_by_kind"] = dict(self._metrics["suppressed_by_kind"])
+        metrics["active_keys"] = len(self._key_bucket)
+        metrics["buckets"] = len(self._buckets)
+        return metrics
+
+    def _bucket(self, bucket_id):
+        """Return the key dict of a live bucket"""
+        return self._buckets[bucket_id - self._buckets[0][0]][1]
+
+    def _record(self, key, now):
+        """Store the log time of a key in the current time bucket"""
+        bucket_id = int(now // self.bucket_seconds)
+        if not self._buckets or self._buckets[-1][0] < bucket_id:
+            # Keep bucket ids contiguous so _bucket() can index directly
+            next_id = self._buckets[-1][0] + 1 if self._buckets else bucket_id
+            for empty_id in range(next_id, bucket_id + 1):
+                self._buckets.append((empty_id, {}))
+        self._buckets[-1][1][key] = now
+        self._key_bucket[key] = self._buckets[-1][0]
+
+        while len(self._key_bucket) > self.max_keys:
+            self._evict_oldest()
+
+    def _expire(self, now):
+        """Drop whole buckets whose newest possible entry is past the cooldown"""
+        while self._buckets:
+            bucket_id, keys = self._buckets[0]
+            if (bucket_id + 1) * self.bucket_seconds > now - self.cooldown:
+                break
+            self._buckets.popleft()
+            for key in keys:
+                del self._key_bucket[key]
+            self._metrics["expired"] += len(keys)
+
+    def _evict_oldest(self):
+        """Evict the oldest key to keep memory bounded"""
+        while self._buckets and not self._buckets[0][1]:
+            self._buckets.popleft()
+        keys = self._buckets[0][1]
+        key = next(iter(keys))
+        del keys[key]
+        del self._key_bucket[key]
+        self._metrics["evicted"] += 1
+
+
+# Test function
+if __name__ == "__main__":
+    print("🧪 Testing Event Deduplicator...")
+
+    fake_now = [0.0]
+    dedup = EventDeduplicator(cooldown=30, bucket_seconds=5, max_keys=3, clock=lambda: fake_now[0])
+
+    print(f"person:John t=0   -> {dedup.should_log('person:John')}")
+    fake_now[0] = 10
+    print(f"person:John t=10  -> {dedup.should_log('person:John')}")
+    stranger_a = "unknown:1"
+    stranger_b = "unknown:2"
+    print(f"{stranger_a} t=10 -> {dedup.should_log(stranger_a)}")
+    print(f"{stranger_b} t=10 -> {dedup.should_log(stranger_b)}")
+    fake_now[0] = 45
+    print(f"person:John t=45  -> {dedup.should_log('person:John')}")
+
+    print(f"\n📊 Metrics: {dedup.get_metrics()}")
+    print("\n✅ Test complete!")
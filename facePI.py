@@ -1,18 +1,128 @@
-import face_recognition
+import time
+PROCESS_START = time.perf_counter()  # Reference point for the start-up timing breakdown
+
+import argparse
 import cv2
 import numpy as np
 import os
-import time
 from datetime import datetime
 import pytz
 
-# Import logging modules
+# Import logging modules (pandas and firebase_admin are imported lazily by these)
 from csv_logger import csv_logger
-from firebase_config import firebase_logger
+from firebase_sync import firebase_sync
+
+# Import streaming attendance report (daily first-in/last-out, weekly presence)
+from attendance_report import AttendanceReport, print_attendance_summary
+
+# Import parallel start-up helpers
+from startup import run_startup_tasks, print_startup_report
+
+# Import packed, memory-mapped gallery store
+from gallery_store import GalleryFile, append_to_gallery, load_or_build_gallery
+
+# Import delta replication of the gallery between door units
+from gallery_replication import GalleryFollower, GalleryPublisher
+
+# Import gallery matcher (single process or sharded across CPU cores)
+from face_matcher import create_matcher
+
+# Import edge client for the optional central match server
+from match_client import RemoteMatcher
 
 # Import door controller for solenoid lock
 from door_controller import initialize_door_controller, unlock_door_for_person, cleanup_door_controller
 
+# Import face detector backends (hog, haar, yunet, dnn)
+from face_detector import available_backends, create_face_detector
+
+# Import named detection / encoding / matching profiles
+from recognition_profiles import DEFAULT_PROFILE, PROFILES, get_profile, next_profile
+
+# Import soak / long-running diagnostics (memory, threads, handles, stage latency)
+from soak_monitor import SoakMonitor
+
+# Import pre-encoding face quality gate
+from face_quality import FaceQualityGate
+
+# Import batched encoding service
+from encoding_service import EncodingService
+
+# Import face tracker for temporal vote aggregation
+from face_tracker import FaceTracker
+
+# Import event dedup for log / unlock cooldowns
+from event_dedup import EventDeduplicator
+
+# Import unknown face store for later enrollment of frequent visitors
+from unknown_faces import UnknownFaceStore
+
+# Face detector backend, selectable at start-up with FACE_DETECTOR=haar python facePI.py
+FACE_DETECTOR_BACKEND = os.environ.get("FACE_DETECTOR", "hog")
+
+# Recognition profile (frame scale, HOG upsample, encoder jitters / landmark model, tolerance).
+# Select with RECOGNITION_PROFILE=pi-fast python facePI.py or --profile pi-fast, 'P' switches live.
+# See: python recognition_profiles.py list / autotune clip.mp4
+RECOGNITION_PROFILE = os.environ.get("RECOGNITION_PROFILE", DEFAULT_PROFILE)
+
+# Batched encoding settings. With a single camera there is nothing to wait for,
+# raise ENCODING_MAX_WAIT_MS when several cameras/frames share this process.
+ENCODING_MAX_BATCH_SIZE = 16
+ENCODING_MAX_WAIT_MS = 0
+ENCODING_WORKERS = 1
+
+# Pre-encoding quality gate: blurry, tiny, badly exposed or turned faces are not encoded.
+# QUALITY_MIN_FACE_SIZE is in full camera frame pixels.
+QUALITY_MIN_FACE_SIZE = 80
+QUALITY_MIN_SHARPNESS = 30.0
+QUALITY_MAX_YAW = 35.0
+QUALITY_MIN_BRIGHTNESS = 40
+QUALITY_MAX_BRIGHTNESS = 220
+
+# 'C' keeps the best quality face seen in this many processed frames
+CAPTURE_BEST_OF_FRAMES = 10
+
+# Packed gallery file, the source of truth for enrolled faces. Only new or changed
+# photos in known_faces/ are encoded into it at start-up.
+# GALLERY_PRECISION can be float32, float16 or int8 (see: python gallery_store.py report)
+GALLERY_FILE = "known_faces.gallery"
+GALLERY_PRECISION = "float32"
+
+# Galleries with at least MATCHER_SHARD_THRESHOLD faces are searched by
+# MATCHER_WORKERS processes in parallel, smaller ones in this process
+MATCHER_WORKERS = os.cpu_count()
+MATCHER_SHARD_THRESHOLD = 20000
+
+# Edge/central mode: with MATCH_SERVER_URL set, this node only detects and encodes,
+# matching is done by match_server.py (local cache is used when it is unreachable)
+MATCH_SERVER_URL = os.environ.get("MATCH_SERVER_URL")
+MATCH_SERVER_TOKEN = os.environ.get("MATCH_SERVER_TOKEN")  # Shared secret of the match server
+MATCH_SERVER_CAFILE = os.environ.get("MATCH_SERVER_CAFILE")  # Server certificate for https:// URLs
+
+# Soak diagnostics: SOAK_MONITOR=1 samples RSS, top allocators, threads, open files and
+# per-stage latency every SOAK_MONITOR_INTERVAL seconds into a rotating soak_monitor.jsonl
+SOAK_MONITOR = os.environ.get("SOAK_MONITOR", "0") == "1"
+SOAK_MONITOR_INTERVAL = 300
+
+# Gallery replication between door units (no photos copied, no re-encoding):
+# the publisher writes deltas to GALLERY_PUBLISH_DIR after every enrollment,
+# followers pull them from GALLERY_FOLLOW_SOURCE (shared directory or replication URL)
+GALLERY_PUBLISH_DIR = os.environ.get("GALLERY_PUBLISH_DIR")
+GALLERY_FOLLOW_SOURCE = os.environ.get("GALLERY_FOLLOW_SOURCE")
+GALLERY_REPLICATION_TOKEN = os.environ.get("GALLERY_REPLICATION_TOKEN")  # Shared secret of a replication server
+GALLERY_REPLICATION_CAFILE = os.environ.get("GALLERY_REPLICATION_CAFILE")  # Server certificate for https:// sources
+GALLERY_FOLLOW_INTERVAL = 30  # Seconds between follower syncs
+
+# Temporal voting: an identity is committed (logged / door unlocked) once
+# VOTE_MIN_VOTES of the last VOTE_WINDOW_SIZE processed frames of a track agree
+VOTE_WINDOW_SIZE = 5
+VOTE_MIN_VOTES = 3
+
+argument_parser = argparse.ArgumentParser(description="Face recognition door system")
+argument_parser.add_argument("--profile", choices=list(PROFILES), default=RECOGNITION_PROFILE,
+                             help="Recognition profile")
+active_profile = get_profile(argument_parser.parse_args().profile)
+
 def get_person_name():
     """Function to get person name for new face"""
     try:
@@ -27,52 +137,89 @@ def get_person_name():
         timestamp = int(time.time())
         return f"Person_{timestamp}"
 
-def load_known_faces_from_folder(folder_path="known_faces"):
-    """Load all known faces from a folder structure"""
-    known_face_encodings = []
-    known_face_names = []
-    
-    if not os.path.exists(folder_path):
-        print(f"📁 Folder {folder_path} tidak ditemukan, membuatnya...")
-        os.makedirs(folder_path)
-        return known_face_encodings, known_face_names
-    
-    print(f"📂 Memuat wajah dari folder: {folder_path}")
-    
-    # Get all image files in the folder (avoid duplicates)
-    image_extensions = ['.jpg', '.jpeg', '.png', '.bmp']
-    image_files = []
-    
-    for file in os.listdir(folder_path):
-        if any(file.lower().endswith(ext) for ext in image_extensions):
-            image_files.append(os.path.join(folder_path, file))
-    
-    for image_path in image_files:
-        try:
-            # Load image
-            image = face_recognition.load_image_file(image_path)
-            
-            # Get face encodings
-            face_encodings = face_recognition.face_encodings(image)
-            
-            if len(face_encodings) > 0:
-                # Use filename (without extension) as the person's name
-                filename = os.path.basename(image_path)
-                name = os.path.splitext(filename)[0]
-                
-                # Add to known faces
-                known_face_encodings.append(face_encodings[0])
-                known_face_names.append(name)
-                
-                print(f"✅ Wajah dimuat: {name} dari {filename}")
-            else:
-                print(f"⚠️  Tidak ada wajah ditemukan di: {os.path.basename(image_path)}")
-                
-        except Exception as e:
-            print(f"❌ Error memuat {os.path.basename(image_path)}: {e}")
-    
-    print(f"📊 Total {len(known_face_encodings)} wajah berhasil dimuat dari folder")
-    return known_face_encodings, known_face_names
+def local_enrollment_allowed():
+    """Followers take their gallery from the publisher, a local write would race the sync thread"""
+    if gallery_follower:
+        print("❌ Unit ini follower replikasi galeri - daftarkan wajah di unit publisher")
+        return False
+    return True
+
+def add_known_faces(encodings, name, source=None):
+    """
+    Add encodings for a person to the gallery and persist the packed gallery file
+
+    source is the [file name, mtime] of the photo saved to known_faces/ for these
+    encodings, so the photo is not encoded again at the next start.
+    """
+    global known_face_encodings, known_face_names, face_matcher
+    if not local_enrollment_allowed():
+        return
+    if MATCH_SERVER_URL:
+        # The server holds the single gallery for all doors
+        if face_matcher.enroll(name, encodings):
+            known_face_names = face_matcher.names
+        return
+
+    append_to_gallery(GALLERY_FILE, encodings, [name] * len(encodings), source=source, precision=GALLERY_PRECISION)
+    gallery = GalleryFile(GALLERY_FILE)
+    known_face_encodings, known_face_names = gallery.matrix(), list(gallery.names)
+    if gallery_publisher:
+        gallery_publisher.publish()
+
+    face_matcher.close()
+    face_matcher = create_matcher(known_face_encodings, known_face_names, MATCHER_WORKERS, MATCHER_SHARD_THRESHOLD)
+
+def load_gallery():
+    """Load the gallery for this node's replication role"""
+    if not gallery_follower:
+        encodings, names = load_or_build_gallery(GALLERY_FILE, "known_faces", GALLERY_PRECISION)
+        if gallery_publisher:
+            gallery_publisher.publish()
+        return encodings, names
+
+    # Followers never rebuild from their photo folder, the replicated gallery is the source
+    try:
+        gallery_follower.sync()
+    except Exception as e:
+        print(f"⚠️  Replikasi galeri gagal: {e} - memakai galeri lokal")
+    if not os.path.exists(GALLERY_FILE):
+        return np.empty((0, 128), dtype=np.float32), []
+    gallery = GalleryFile(GALLERY_FILE)
+    return gallery.matrix(), list(gallery.names)
+
+def promote_unknown_cluster(unknown_face_store):
+    """Show unknown face clusters and promote one to a named identity"""
+    clusters = unknown_face_store.list_clusters()
+    if not clusters:
+        print("Tidak ada wajah tak dikenal yang tersimpan")
+        return
+
+    print("\n👤 CLUSTER WAJAH TAK DIKENAL:")
+    print("=" * 50)
+    for cluster in clusters[:20]:
+        last_seen = datetime.fromtimestamp(cluster['last_seen']).strftime('%Y-%m-%d %H:%M:%S')
+        thumbnail = os.path.join(unknown_face_store.store_dir, cluster['thumbnail']) if cluster['thumbnail'] else "-"
+        print(f"#{cluster['cluster_id']:<4} {cluster['count']:>4}x  terakhir: {last_seen}  foto: {thumbnail}")
+    print("=" * 50)
+
+    try:
+        choice = input("🔸 Nomor cluster yang akan didaftarkan (Enter untuk batal): ").strip()
+    except:
+        return
+    if not choice.isdigit():
+        return
+
+    name = get_person_name()
+    encodings, source = unknown_face_store.promote_cluster(int(choice), name)
+    if encodings:
+        add_known_faces(encodings, name, source=source)
+        print(f"👥 Total wajah yang dikenal sekarang: {len(set(known_face_names))}")
+
+def open_camera(camera_index=1):
+    """Open the webcam and wait for the first frame (sensor warm-up)"""
+    video_capture = cv2.VideoCapture(camera_index)
+    video_capture.read()
+    return video_capture
 
 # This is a demo of running face recognition on live video from your webcam. It's a little more complicated than the
 # other example, but it includes some basic performance tweaks to make things run a lot faster:
@@ -83,20 +230,67 @@ def load_known_faces_from_folder(folder_path="known_faces"):
 # OpenCV is *not* required to use the face_recognition library. It's only required if you want to run this
 # specific demo. If you have trouble installing it, try any of the other demos that don't require it instead.
 
-# Get a reference to webcam #0 (the default one)
-video_capture = cv2.VideoCapture(1)
+imports_done_at = time.perf_counter() - PROCESS_START
+
+# Firebase connects in its own background worker, nothing waits for it
+firebase_sync.start()
+
+# Gallery replication role of this door unit
+gallery_publisher = GalleryPublisher(GALLERY_FILE, GALLERY_PUBLISH_DIR) if GALLERY_PUBLISH_DIR else None
+# (edge nodes of a match server have no local gallery to follow)
+gallery_follower = None
+if GALLERY_FOLLOW_SOURCE and not MATCH_SERVER_URL:
+    gallery_follower = GalleryFollower(GALLERY_FILE, GALLERY_FOLLOW_SOURCE,
+                                       token=GALLERY_REPLICATION_TOKEN, cafile=GALLERY_REPLICATION_CAFILE)
+
+# Batched encoding service (loads the dlib models when started)
+encoding_service = EncodingService(
+    max_batch_size=ENCODING_MAX_BATCH_SIZE,
+    max_wait_ms=ENCODING_MAX_WAIT_MS,
+    num_workers=ENCODING_WORKERS,
+    num_jitters=active_profile.num_jitters,
+    model=active_profile.landmark_model
+)
+
+# Camera warm-up, gallery load, detector/encoder models and door/GPIO init are
+# independent of each other, so run them concurrently
+print("🔄 Menginisialisasi kamera, wajah terdaftar, detektor, encoder dan door controller...")
+startup_tasks = {
+    "camera": lambda: open_camera(1),  # Get a reference to webcam #1
+    "detector": lambda: create_face_detector(FACE_DETECTOR_BACKEND, **active_profile.detector_options(FACE_DETECTOR_BACKEND)),
+    "encoder": encoding_service.start,
+    "door": lambda: initialize_door_controller(relay_pin=18, lock_duration=5),
+}
+if not MATCH_SERVER_URL:
+    # Edge nodes match against the server's gallery, their known_faces/ folder is not encoded
+    startup_tasks["gallery"] = load_gallery
+startup_results, startup_timings = run_startup_tasks(startup_tasks, PROCESS_START)
+
+video_capture = startup_results["camera"]
+known_face_encodings, known_face_names = startup_results.get("gallery") or (np.empty((0, 128), dtype=np.float32), [])
+face_detector = startup_results["detector"]
+door_controller = startup_results["door"]
+if door_controller:
+    print("🚪 Door controller initialized - GPIO pin 18, unlock duration 5 seconds")
+
+if MATCH_SERVER_URL:
+    face_matcher = RemoteMatcher(MATCH_SERVER_URL, token=MATCH_SERVER_TOKEN, cafile=MATCH_SERVER_CAFILE)
+    known_face_names = face_matcher.names
+else:
+    face_matcher = create_matcher(known_face_encodings, known_face_names, MATCHER_WORKERS, MATCHER_SHARD_THRESHOLD)
 
-# Load known faces from folder
-print("🔄 Memuat wajah terdaftar...")
-known_face_encodings, known_face_names = load_known_faces_from_folder("known_faces")
+print_startup_report(startup_timings, PROCESS_START, imports_done_at)
+print(f"🎛️  Profil pengenalan: {active_profile.name} (skala {active_profile.scale}, "
+      f"tolerance {active_profile.tolerance})")
 
-# Initialize door controller system
-print("🔄 Menginisialisasi sistem kontrol pintu...")
-door_controller = initialize_door_controller(relay_pin=18, lock_duration=5)
-print("🚪 Door controller initialized - GPIO pin 18, unlock duration 5 seconds")
+if gallery_follower:
+    gallery_follower.take_update()  # The start-up sync is already loaded
+    gallery_follower.start(GALLERY_FOLLOW_INTERVAL)
 
 # Display information about loaded faces
-if len(known_face_encodings) == 0:
+if MATCH_SERVER_URL:
+    print(f"🌐 Pencocokan di match server: {MATCH_SERVER_URL}")
+elif len(known_face_encodings) == 0:
     print("❌ Tidak ada wajah yang berhasil dimuat!")
     print("💡 Letakkan foto wajah di folder 'known_faces/' dengan format:")
     print("   - Format yang didukung: .jpg, .jpeg, .png, .bmp")
@@ -104,7 +298,7 @@ if len(known_face_encodings) == 0:
     print("   - Pastikan foto berisi wajah yang jelas")
     print("🎥 Anda tetap dapat menambah wajah menggunakan webcam (tekan 'C' untuk capture)")
 
-print(f"👥 Total wajah terdaftar: {len(known_face_names)}")
+print(f"👥 Total wajah terdaftar: {len(face_matcher)}")
 if known_face_names:
     print(f"📋 Daftar wajah: {', '.join(known_face_names)}")
 print()
@@ -115,12 +309,33 @@ face_encodings = []
 face_names = []
 process_this_frame = True
 debug_mode = False  # Debug mode to show distance values
+face_tracker = FaceTracker(window_size=VOTE_WINDOW_SIZE, min_votes=VOTE_MIN_VOTES)
+quality_gate = FaceQualityGate(
+    min_face_size=QUALITY_MIN_FACE_SIZE,
+    min_sharpness=QUALITY_MIN_SHARPNESS,
+    max_yaw=QUALITY_MAX_YAW,
+    min_brightness=QUALITY_MIN_BRIGHTNESS,
+    max_brightness=QUALITY_MAX_BRIGHTNESS,
+    landmark_model=active_profile.landmark_model  # Same model as the encoder, its landmarks are reused
+)
+rejected_faces = []  # Quality assessments of faces skipped in the last processed frame
+capture_frames_left = 0  # Processed frames left in the current capture window
 
 # Logging variables
-last_logged_faces = {}  # Track last log time for each person
 log_cooldown = 30  # Seconds between logs for same person
+event_deduplicator = EventDeduplicator(cooldown=log_cooldown)  # Bounded cooldown per person / stranger
+unknown_face_store = UnknownFaceStore("unknown_faces")  # Clustered unknown encodings for fast enrollment
+attendance_report = AttendanceReport(csv_logger.log_file)  # Cached per-day attendance aggregates
 detection_confidence_threshold = 0.6  # Confidence threshold for logging
 
+# Drift of memory / threads / handles / latency after days of uptime is flagged by the soak monitor
+soak_monitor = SoakMonitor(interval=SOAK_MONITOR_INTERVAL, enabled=SOAK_MONITOR)
+soak_monitor.add_gauge("dedup_active_keys", lambda: event_deduplicator.get_metrics()["active_keys"])
+soak_monitor.add_gauge("tracker_active_tracks", lambda: face_tracker.get_stats()["active_tracks"])
+soak_monitor.add_gauge("unknown_encodings", lambda: unknown_face_store.total_encodings)
+soak_monitor.add_gauge("gallery_size", lambda: len(face_matcher))
+soak_monitor.start()
+
 # Display startup information
 print("🎥 FACE RECOGNITION SYSTEM WITH LOGGING")
 print("=" * 50)
@@ -135,24 +350,31 @@ print("  X      - Exit system")
 print("  C      - Capture photo for new face")
 print("  S      - Save captured face")
 print("  D      - Toggle debug mode (show distance values)")
+print("  B      - Switch face detector backend")
 print("  L      - Show today's detection logs")
 print("  R      - Show detection statistics")
+print("  N      - Enroll a frequent unknown visitor")
 print("  U      - Manual unlock door (5 seconds)")
 print("  K      - Force lock door immediately")
 print("  T      - Test door controller")
+print("  P      - Switch recognition profile")
 print("=" * 50)
 print("📹 Webcam active... Use keyboard controls as needed")
 print()
 
-# Test Firebase connection
-if firebase_logger.is_connected:
-    print("🔥 Firebase: Terhubung")
-else:
-    print("⚠️  Firebase: Tidak terhubung (hanya CSV yang akan digunakan)")
+# Firebase connection status is reported by the sync worker once connected
+print("🔥 Firebase: menghubungkan di background...")
 print(f"📊 CSV Logger: Aktif - File: {csv_logger.log_file}")
 print()
 
 while True:
+    # Swap in the replicated gallery once the follower applied new deltas
+    if gallery_follower and gallery_follower.take_update():
+        gallery = GalleryFile(GALLERY_FILE)
+        known_face_encodings, known_face_names = gallery.matrix(), list(gallery.names)
+        face_matcher.close()
+        face_matcher = create_matcher(known_face_encodings, known_face_names, MATCHER_WORKERS, MATCHER_SHARD_THRESHOLD)
+
     # Grab a single frame of video
     ret, frame = video_capture.read()
     if not ret or frame is None:
@@ -167,81 +389,126 @@ while True:
 
     # Only process every other frame of video to save time
     if process_this_frame:
-        # Resize frame of video to 1/4 size for faster face recognition processing
-        small_frame = cv2.resize(display_frame, (0, 0), fx=0.25, fy=0.25)
+        frame_start = time.perf_counter()
+
+        # Resize frame of video to the profile's scale for faster face recognition processing
+        scale = active_profile.scale
+        small_frame = cv2.resize(display_frame, (0, 0), fx=scale, fy=scale)
 
         # Convert the image from BGR color (which OpenCV uses) to RGB color (which face_recognition uses)
         rgb_small_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
         
-        # Find all the faces and face encodings in the current frame of video
-        face_locations = face_recognition.face_locations(rgb_small_frame)
+        # Find all the faces in the current frame, only encode the ones good enough to match
+        with soak_monitor.stage("detect"):
+            detected_locations = face_detector.detect(rgb_small_frame)
+        with soak_monitor.stage("quality"):
+            face_locations, face_qualities = quality_gate.filter(rgb_small_frame, detected_locations, scale=scale)
+        rejected_faces = [quality for quality in face_qualities if not quality.passed]
+        if debug_mode:
+            for quality in rejected_faces:
+                print(f"🚫 Wajah dilewati: {', '.join(quality.reasons)} (ukuran {quality.size:.0f}px, "
+                      f"ketajaman {quality.sharpness:.0f}, kecerahan {quality.brightness:.0f})")
         if face_locations:
-            face_encodings = face_recognition.face_encodings(rgb_small_frame, face_locations)
+            with soak_monitor.stage("encode"):
+                face_encodings = encoding_service.encode(rgb_small_frame, face_locations, source_id="Camera-1",
+                                                         landmarks=quality_gate.accepted_landmarks(face_qualities))
         else:
             face_encodings = []
 
+        # Capture mode: keep the best quality face of the capture window for enrollment
+        if capture_frames_left > 0:
+            accepted_qualities = [quality for quality in face_qualities if quality.passed]
+            for quality, face_encoding in zip(accepted_qualities, face_encodings):
+                if quality.score > captured_score:
+                    captured_score = quality.score
+                    captured_frame = clean_frame.copy()  # Use clean frame without overlays
+                    captured_locations = [quality.box]
+                    captured_encodings = [face_encoding]
+            capture_frames_left -= 1
+            if capture_frames_left == 0:
+                if captured_score > 0:
+                    print(f"📸 Foto terbaik diambil (kualitas {captured_score:.2f})! "
+                          "Tekan 'S' untuk menyimpan wajah, atau 'C' lagi untuk foto ulang")
+                else:
+                    print("❌ Tidak ada wajah dengan kualitas cukup! Hadap kamera dengan cahaya yang baik dan tekan 'C' lagi")
+
         face_names = []
-        for face_encoding in face_encodings:
-            # See if the face is a match for the known face(s) with custom tolerance
-            tolerance = 0.6  # Lower tolerance for better matching (default is 0.6)
-            matches = face_recognition.compare_faces(known_face_encodings, face_encoding, tolerance=tolerance)
+        match_start = time.perf_counter()
+        face_tracks = face_tracker.update(face_locations)
+        for track, face_encoding in zip(face_tracks, face_encodings):
+            # A track committed to a known identity keeps it until its appearance changes
+            # ("Unknown" tracks keep matching so a better frame can still open the door)
+            if not face_tracker.needs_matching(track, face_encoding):
+                face_names.append(track.identity)
+                continue
+
+            # See if the face is a match for the known face(s) with the profile's tolerance
+            tolerance = active_profile.tolerance
             name = "Unknown"
             confidence = None
 
             # Use the known face with the smallest distance to the new face
-            if len(known_face_encodings) > 0:
-                face_distances = face_recognition.face_distance(known_face_encodings, face_encoding)
-                best_match_index = np.argmin(face_distances)
-                best_distance = face_distances[best_match_index]
+            if len(face_matcher) > 0:
+                closest_name, best_distance = face_matcher.best_name(face_encoding)
                 
                 # Check if the best match is within our tolerance and show distance for debugging
-                if best_distance <= tolerance:
-                    name = known_face_names[best_match_index]
+                if best_distance is None:
+                    # Empty gallery (e.g. match server dropped before the edge cache was filled)
+                    if debug_mode:
+                        print("❌ No match - galeri kosong")
+                elif best_distance <= tolerance:
+                    name = closest_name
                     confidence = 1.0 - best_distance  # Convert distance to confidence
-                    
-                    # Log detection if cooldown period has passed
-                    current_time = time.time()
-                    if name not in last_logged_faces or (current_time - last_logged_faces[name]) >= log_cooldown:
-                        # Log to CSV (simplified: hanya nama, hari, tanggal)
-                        csv_logger.log_detection(name=name)
-                        
-                        # Log to Firebase (simplified: hanya nama, hari, tanggal)
-                        firebase_logger.log_detection(name=name)
-                        
-                        # 🚪 UNLOCK DOOR FOR RECOGNIZED PERSON
-                        unlock_success = unlock_door_for_person(name)
-                        if unlock_success:
-                            print(f"🔓 Selamat Datang !, {name}!")
-                        
-                        # Update last logged time
-                        last_logged_faces[name] = current_time
-                    
                     if debug_mode:
                         print(f"✅ Match: {name} (confidence: {confidence:.3f}, distance: {best_distance:.3f})")
                 else:
                     # Unknown face detected
                     if debug_mode:
-                        print(f"❌ No match - closest: {known_face_names[best_match_index]} (distance: {best_distance:.3f}, tolerance: {tolerance})")
-                    
-                    # Log unknown face detection (with cooldown)
-                    current_time = time.time()
-                    if "Unknown" not in last_logged_faces or (current_time - last_logged_faces["Unknown"]) >= log_cooldown:
-                        csv_logger.log_detection(name="Unknown")
-                        firebase_logger.log_detection(name="Unknown")
-                        last_logged_faces["Unknown"] = current_time
+                        print(f"❌ No match - closest: {closest_name} (distance: {best_distance:.3f}, tolerance: {tolerance})")
+
+                # Only act once the track's votes agree on an identity
+                if face_tracker.add_vote(track, name, best_distance, face_encoding):
+                    if debug_mode:
+                        print(f"🗳️  Track {track.track_id}: identitas di-commit sebagai {track.identity}")
+
+                    name = track.identity
+                    if name != "Unknown":
+                        # Log detection if cooldown period has passed
+                        if event_deduplicator.should_log(f"person:{name}"):
+                            # Log to CSV (simplified: hanya nama, hari, tanggal)
+                            csv_logger.log_detection(name=name)
+                            
+                            # Log to Firebase (simplified: hanya nama, hari, tanggal)
+                            firebase_sync.log_detection(name=name)
+                            
+                            # 🚪 UNLOCK DOOR FOR RECOGNIZED PERSON
+                            unlock_success = unlock_door_for_person(name)
+                            if unlock_success:
+                                print(f"🔓 Selamat Datang !, {name}!")
+                    else:
+                        # Keep the stranger's encoding (and a face crop) for later enrollment
+                        top, right, bottom, left = (int(v / scale) for v in track.box)
+                        cluster_id = unknown_face_store.add(track.anchor_encoding,
+                                                            face_image=clean_frame[top:bottom, left:right])
+
+                        # Log unknown face detection (with cooldown per stranger cluster, not one global "Unknown")
+                        if event_deduplicator.should_log(f"unknown:{cluster_id}"):
+                            csv_logger.log_detection(name="Unknown")
+                            firebase_sync.log_detection(name="Unknown")
 
             face_names.append(name)
 
+        soak_monitor.record("match", time.perf_counter() - match_start)
+        soak_monitor.record("frame", time.perf_counter() - frame_start)
+        soak_monitor.tick()
+
     process_this_frame = not process_this_frame
 
 
     # Display the results
     for (top, right, bottom, left), name in zip(face_locations, face_names):
-        # Scale back up face locations since the frame we detected in was scaled to 1/4 size
-        top *= 4
-        right *= 4
-        bottom *= 4
-        left *= 4
+        # Scale back up face locations since the frame we detected in was scaled down
+        top, right, bottom, left = (int(v / active_profile.scale) for v in (top, right, bottom, left))
 
         # Choose color based on recognition status
         if name == "Unknown":
@@ -257,6 +524,13 @@ while True:
         font = cv2.FONT_HERSHEY_DUPLEX
         cv2.putText(display_frame, name, (left + 6, bottom - 6), font, 1.0, (255, 255, 255), 1)
 
+    # Faces skipped by the quality gate get a thin gray box with the reason
+    for quality in rejected_faces:
+        top, right, bottom, left = (int(v / active_profile.scale) for v in quality.box)
+        cv2.rectangle(display_frame, (left, top), (right, bottom), (128, 128, 128), 1)
+        cv2.putText(display_frame, ", ".join(quality.reasons), (left, max(top - 6, 12)),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.4, (128, 128, 128), 1)
+
     # Display control instructions on the video
     instructions = [
         "Controls:",
@@ -264,11 +538,14 @@ while True:
         "C - Capture", 
         "S - Save",
         "D - Debug mode",
+        "B - Detector",
         "L - Show logs",
         "R - Statistics",
+        "N - Enroll unknown",
         "U - Unlock door",
         "K - Lock door",
-        "T - Test door"
+        "T - Test door",
+        "P - Profile"
     ]
     
     y_offset = 30
@@ -280,7 +557,9 @@ while True:
     # Show face count and detection info
     cv2.putText(display_frame, f"Faces detected: {len(face_locations)}", (10, display_frame.shape[0] - 60), 
                cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-    cv2.putText(display_frame, f"Known faces: {len(known_face_names)}", (10, display_frame.shape[0] - 40), 
+    cv2.putText(display_frame, f"Known faces: {len(face_matcher)}", (10, display_frame.shape[0] - 40), 
+               cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+    cv2.putText(display_frame, f"Detector: {face_detector.name}", (10, display_frame.shape[0] - 80), 
                cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
     cv2.putText(display_frame, "Tips: Face camera directly, good lighting", (10, display_frame.shape[0] - 20), 
                cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0, 255, 255), 1)
@@ -309,6 +588,25 @@ while True:
             print("🔍 Debug mode ON - akan menampilkan distance values")
         else:
             print("🔍 Debug mode OFF")
+    elif key == ord('b'):
+        # Switch to the next available face detector backend
+        backends = available_backends()
+        current_index = backends.index(face_detector.name) if face_detector.name in backends else -1
+        next_backend = backends[(current_index + 1) % len(backends)]
+        face_detector = create_face_detector(next_backend, **active_profile.detector_options(next_backend))
+    elif key == ord('p'):
+        # Switch to the next recognition profile
+        active_profile = next_profile(active_profile)
+        face_detector = create_face_detector(face_detector.name, **active_profile.detector_options(face_detector.name))
+        encoding_service.num_jitters = active_profile.num_jitters
+        encoding_service.model = active_profile.landmark_model
+        quality_gate.landmark_model = active_profile.landmark_model
+        # Boxes of the old scale mean nothing at the new one
+        face_tracker.clear()
+        face_locations, face_names, rejected_faces = [], [], []
+        print(f"🎛️  Profil pengenalan: {active_profile.name} (skala {active_profile.scale}, "
+              f"upsample {active_profile.upsample}, jitter {active_profile.num_jitters}, "
+              f"landmark {active_profile.landmark_model}, tolerance {active_profile.tolerance})")
     elif key == ord('l'):
         # Show today's logs
         print("\n📊 LOG DETEKSI HARI INI:")
@@ -335,29 +633,41 @@ while True:
             print(f"Deteksi terakhir: {stats.get('last_detection', 'N/A')}")
         else:
             print("Tidak ada data statistik")
+        tracker_stats = face_tracker.get_stats()
+        print(f"Track aktif: {tracker_stats['active_tracks']} | Identitas di-commit: {tracker_stats['commits']}")
+        print(f"Matching dilakukan: {tracker_stats['matches_done']} | Matching dilewati: {tracker_stats['matches_skipped']}")
+        dedup_metrics = event_deduplicator.get_metrics()
+        print(f"Log diizinkan: {dedup_metrics['allowed']} | Log ditahan (cooldown): {dedup_metrics['suppressed']} "
+              f"{dedup_metrics['suppressed_by_kind']}")
+        print(f"Key cooldown aktif: {dedup_metrics['active_keys']} | Kadaluarsa: {dedup_metrics['expired']} "
+              f"| Dibuang (batas memori): {dedup_metrics['evicted']}")
+        quality_metrics = quality_gate.get_metrics()
+        print(f"Wajah lolos kualitas: {quality_metrics['passed']}/{quality_metrics['checked']} "
+              f"| Ditolak: {quality_metrics['rejected_by_reason']}")
         print("=" * 50)
+        print_attendance_summary(attendance_report, datetime.now(pytz.timezone('Asia/Jakarta')).strftime('%Y-%m-%d'))
         print()
+    elif key == ord('n'):
+        # Promote a cluster of unknown faces to a named identity (no re-encoding)
+        if local_enrollment_allowed():
+            promote_unknown_cluster(unknown_face_store)
     elif key == ord('c'):
-        # Capture current frame for adding new face
-        if len(face_locations) > 0:
-            print("📸 Foto berhasil diambil! Tekan 'S' untuk menyimpan wajah, atau 'C' lagi untuk foto ulang")
-            captured_frame = clean_frame.copy()  # Use clean frame without overlays
-            captured_locations = face_locations.copy()
-            captured_encodings = face_encodings.copy()
-        else:
-            print("❌ Tidak ada wajah yang terdeteksi! Posisikan wajah Anda di depan kamera dan tekan 'C' lagi")
+        # Capture the best quality face of the next processed frames for adding a new face
+        if 'captured_encodings' in locals():
+            del captured_frame, captured_locations, captured_encodings
+        captured_score = 0.0
+        capture_frames_left = CAPTURE_BEST_OF_FRAMES
+        print(f"📸 Mengambil foto terbaik dari {CAPTURE_BEST_OF_FRAMES} frame, tahan posisi wajah Anda...")
     elif key == ord('s'):
         # Save captured face to known faces
-        if 'captured_encodings' in locals() and len(captured_encodings) > 0:
+        if not local_enrollment_allowed():
+            pass
+        elif 'captured_encodings' in locals() and len(captured_encodings) > 0:
             print("\n🔄 Menyimpan wajah baru...")
             
             # Get name from user input
             new_name = get_person_name()
             
-            # Add the first detected face to known faces
-            known_face_encodings.append(captured_encodings[0])
-            known_face_names.append(new_name)
-            
             # Create known_faces directory if it doesn't exist
             known_faces_dir = "known_faces"
             os.makedirs(known_faces_dir, exist_ok=True)
@@ -366,6 +676,10 @@ while True:
             filename = os.path.join(known_faces_dir, f"{new_name}.jpg")
             cv2.imwrite(filename, captured_frame)
             
+            # Add the first detected face to known faces (recorded as coming from the saved photo)
+            add_known_faces([captured_encodings[0]], new_name,
+                            source=[os.path.basename(filename), os.path.getmtime(filename)])
+            
             print(f"✅ Wajah baru berhasil ditambahkan dengan nama: {new_name}")
             print(f"📁 Foto disimpan sebagai: {filename}")
             print(f"👥 Total wajah yang dikenal sekarang: {len(known_face_names)}")
@@ -412,6 +726,23 @@ print("\n🔄 Membersihkan resource...")
 print("🚪 Membersihkan door controller...")
 cleanup_door_controller()
 
+# Stop encoding service
+encoding_service.stop()
+
+# Stop matcher workers and gallery replication
+face_matcher.close()
+if gallery_follower:
+    gallery_follower.stop()
+
+# Final soak sample
+soak_monitor.stop()
+
+# Persist unknown face clusters
+unknown_face_store.save()
+
+# Flush pending Firebase logs
+firebase_sync.stop()
+
 video_capture.release()
 cv2.destroyAllWindows()
 print("✅ Webcam dilepas")
@@ -0,0 +1,225 @@
+"""
+Face Detector Module untuk Face Recognition System
+Abstraksi detektor wajah dengan beberapa backend yang bisa dipilih saat runtime:
+- hog    : dlib HOG via face_recognition (default, paling akurat di CPU)
+- haar   : OpenCV Haar cascade (paling cepat di ARM)
+- yunet  : OpenCV FaceDetectorYN (butuh file model .onnx)
+- dnn    : OpenCV DNN res10 SSD (butuh file model Caffe)
+
+Semua backend mengembalikan box dalam format (top, right, bottom, left)
+sehingga bisa langsung dipakai oleh face_recognition.face_encodings.
+"""
+
+import os
+
+import cv2
+
+# Default locations for bundled model files
+MODELS_DIR = "models"
+YUNET_MODEL_PATH = os.path.join(MODELS_DIR, "face_detection_yunet_2023mar.onnx")
+DNN_PROTOTXT_PATH = os.path.join(MODELS_DIR, "deploy.prototxt")
+DNN_MODEL_PATH = os.path.join(MODELS_DIR, "res10_300x300_ssd_iter_140000.caffemodel")
+
+
+def _clip_box(top, right, bottom, left, image_shape):
+    """Clip a (top, right, bottom, left) box to the image bounds"""
+    height, width = image_shape[:2]
+    return (max(int(top), 0), min(int(right), width), min(int(bottom), height), max(int(left), 0))
+
+
+def _xywh_to_css(x, y, w, h, image_shape):
+    """Convert an OpenCV (x, y, w, h) box to (top, right, bottom, left)"""
+    return _clip_box(y, x + w, y + h, x, image_shape)
+
+
+def box_iou(box_a, box_b):
+    """Intersection over union of two (top, right, bottom, left) boxes"""
+    top = max(box_a[0], box_b[0])
+    right = min(box_a[1], box_b[1])
+    bottom = min(box_a[2], box_b[2])
+    left = max(box_a[3], box_b[3])
+
+    intersection = max(0, right - left) * max(0, bottom - top)
+    if intersection == 0:
+        return 0.0
+
+    area_a = (box_a[1] - box_a[3]) * (box_a[2] - box_a[0])
+    area_b = (box_b[1] - box_b[3]) * (box_b[2] - box_b[0])
+    return intersection / float(area_a + area_b - intersection)
+
+
+class FaceDetector:
+    """Base class for face detector backends"""
+
+    name = "base"
+
+    def detect(self, rgb_image):
+        """
+        Detect faces in an RGB image
+
+        Args:
+            rgb_image (ndarray): RGB image (as used by face_recognition)
+
+        Returns:
+            list: Face boxes as (top, right, bottom, left) tuples
+        """
+        raise NotImplementedError
+
+    @classmethod
+    def is_available(cls):
+        """Return True if this backend can run on this system"""
+        return True
+
+
+class HOGFaceDetector(FaceDetector):
+    """dlib HOG detector (face_recognition.face_locations)"""
+
+    name = "hog"
+
+    def __init__(self, upsample=1):
+        import face_recognition
+        self._face_locations = face_recognition.face_locations
+        self.upsample = upsample
+
+    def detect(self, rgb_image):
+        return self._face_locations(rgb_image, number_of_times_to_upsample=self.upsample, model="hog")
+
+
+class HaarFaceDetector(FaceDetector):
+    """OpenCV Haar cascade detector (frontal face)"""
+
+    name = "haar"
+    cascade_file = "haarcascade_frontalface_default.xml"
+
+    def __init__(self, scale_factor=1.1, min_neighbors=5, min_size=(20, 20)):
+        cascade_path = os.path.join(cv2.data.haarcascades, self.cascade_file)
+        self.cascade = cv2.CascadeClassifier(cascade_path)
+        if self.cascade.empty():
+            raise RuntimeError(f"Haar cascade tidak bisa dimuat: {cascade_path}")
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.min_size = min_size
+
+    @classmethod
+    def is_available(cls):
+        return hasattr(cv2, "data") and os.path.exists(os.path.join(cv2.data.haarcascades, cls.cascade_file))
+
+    def detect(self, rgb_image):
+        gray = cv2.cvtColor(rgb_image, cv2.COLOR_RGB2GRAY)
+        faces = self.cascade.detectMultiScale(
+            gray,
+            scaleFactor=self.scale_factor,
+            minNeighbors=self.min_neighbors,
+            minSize=self.min_size
+        )
+        return [_xywh_to_css(x, y, w, h, rgb_image.shape) for (x, y, w, h) in faces]
+
+
+class YuNetFaceDetector(FaceDetector):
+    """OpenCV FaceDetectorYN (YuNet) detector"""
+
+    name = "yunet"
+
+    def __init__(self, model_path=YUNET_MODEL_PATH, score_threshold=0.8, nms_threshold=0.3):
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"Model YuNet tidak ditemukan: {model_path}")
+        self.detector = cv2.FaceDetectorYN.create(model_path, "", (320, 320), score_threshold, nms_threshold)
+        self._input_size = (320, 320)
+
+    @classmethod
+    def is_available(cls):
+        return hasattr(cv2, "FaceDetectorYN") and os.path.exists(YUNET_MODEL_PATH)
+
+    def detect(self, rgb_image):
+        height, width = rgb_image.shape[:2]
+        if self._input_size != (width, height):
+            self.detector.setInputSize((width, height))
+            self._input_size = (width, height)
+
+        bgr_image = cv2.cvtColor(rgb_image, cv2.COLOR_RGB2BGR)
+        _, faces = self.detector.detect(bgr_image)
+        if faces is None:
+            return []
+        return [_xywh_to_css(*face[:4], rgb_image.shape) for face in faces]
+
+
+class DNNFaceDetector(FaceDetector):
+    """OpenCV DNN res10 SSD detector (Caffe model)"""
+
+    name = "dnn"
+
+    def __init__(self, prototxt_path=DNN_PROTOTXT_PATH, model_path=DNN_MODEL_PATH, confidence_threshold=0.6):
+        if not os.path.exists(prototxt_path) or not os.path.exists(model_path):
+            raise FileNotFoundError(f"Model DNN tidak ditemukan: {prototxt_path} / {model_path}")
+        self.net = cv2.dnn.readNetFromCaffe(prototxt_path, model_path)
+        self.confidence_threshold = confidence_threshold
+
+    @classmethod
+    def is_available(cls):
+        return os.path.exists(DNN_PROTOTXT_PATH) and os.path.exists(DNN_MODEL_PATH)
+
+    def detect(self, rgb_image):
+        height, width = rgb_image.shape[:2]
+        # The res10 model was trained on BGR input with these channel means
+        bgr_image = cv2.cvtColor(rgb_image, cv2.COLOR_RGB2BGR)
+        blob = cv2.dnn.blobFromImage(bgr_image, 1.0, (300, 300), (104.0, 177.0, 123.0))
+        self.net.setInput(blob)
+        detections = self.net.forward()
+
+        boxes = []
+        for i in range(detections.shape[2]):
+            confidence = detections[0, 0, i, 2]
+            if confidence < self.confidence_threshold:
+                continue
+            left, top, right, bottom = detections[0, 0, i, 3:7] * [width, height, width, height]
+            box = _clip_box(top, right, bottom, left, rgb_image.shape)
+            if box[2] > box[0] and box[1] > box[3]:
+                boxes.append(box)
+        return boxes
+
+
+DETECTOR_BACKENDS = {
+    HOGFaceDetector.name: HOGFaceDetector,
+    HaarFaceDetector.name: HaarFaceDetector,
+    YuNetFaceDetector.name: YuNetFaceDetector,
+    DNNFaceDetector.name: DNNFaceDetector,
+}
+
+
+def available_backends():
+    """Return the names of detector backends usable on this system"""
+    return [name for name, cls in DETECTOR_BACKENDS.items() if cls.is_available()]
+
+
+def create_face_detector(backend="hog", **kwargs):
+    """
+    Create a face detector for the given backend
+
+    Falls back to the HOG detector if the requested backend is unknown or
+    its model file is missing, so the recognition loop always has a detector.
+
+    Args:
+        backend (str): Backend name (hog, haar, yunet, dnn)
+        **kwargs: Backend specific options
+
+    Returns:
+        FaceDetector: The initialized detector
+    """
+    detector_class = DETECTOR_BACKENDS.get(backend)
+    if detector_class is None:
+        print(f"⚠️  Backend detektor tidak dikenal: {backend} - menggunakan 'hog'")
+        return HOGFaceDetector()
+
+    try:
+        detector = detector_class(**kwargs)
+        print(f"🔍 Face detector: {detector.name}")
+        return detector
+    except Exception as e:
+        print(f"⚠️  Backend detektor '{backend}' tidak tersedia ({e}) - menggunakan 'hog'")
+        return HOGFaceDetector()
+
+
+# Test function
+if __name__ == "__main__":
+    print("🧪 Testing Face Detector backends...")
+    print(f"📋 Backend tersedia: {', '.join(available_backends())}")
@@ -0,0 +1,298 @@
+"""
+Face Matcher Module untuk Face Recognition System
+Mencari identitas terdekat untuk encoding wajah di galeri.
+
+- LinearMatcher  : satu proses, jarak dihitung vektor (matmul) dengan norm yang
+                   sudah dihitung sebelumnya
+- ShardedMatcher : galeri dibagi ke beberapa worker process lewat
+                   multiprocessing.shared_memory (galeri hanya disalin sekali saat
+                   dibuat, tidak per query). Tiap shard menghitung top-k lokal
+                   secara paralel, lalu hasilnya digabung. Worker dijalankan
+                   dengan forkserver/spawn (bukan fork dari proses yang sudah
+                   punya thread). Jika worker mati atau tidak menjawab dalam
+                   batas waktu, worker dihentikan dan semua query berikutnya
+                   dijawab LinearMatcher.
+
+create_matcher() memilih ShardedMatcher hanya untuk galeri besar; galeri kecil
+tetap memakai LinearMatcher karena overhead IPC lebih besar dari perhitungannya.
+"""
+
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+import types
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+
+import numpy as np
+
+ENCODING_DIM = 128
+
+
+def _squared_norms(matrix):
+    return np.einsum("ij,ij->i", matrix, matrix)
+
+
+def _top_k(distances, k):
+    """Indices of the k smallest distances per row, sorted ascending"""
+    k = min(k, distances.shape[1])
+    if k < distances.shape[1]:
+        candidates = np.argpartition(distances, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.tile(np.arange(distances.shape[1]), (distances.shape[0], 1))
+    candidate_distances = np.take_along_axis(distances, candidates, axis=1)
+    order = np.argsort(candidate_distances, axis=1)
+    return np.take_along_axis(candidates, order, axis=1), np.take_along_axis(candidate_distances, order, axis=1)
+
+
+def _distances(queries, matrix, norms):
+    """Euclidean distances using |g|^2 + |q|^2 - 2 g.q (one matmul per call)"""
+    squared = norms[np.newaxis, :] + _squared_norms(queries)[:, np.newaxis] - 2.0 * (queries @ matrix.T)
+    return np.sqrt(np.maximum(squared, 0.0))
+
+
+class LinearMatcher:
+    def __init__(self, encodings, names):
+        """
+        Initialize a single process matcher
+
+        Args:
+            encodings (ndarray): N x 128 gallery matrix
+            names (list): N names, parallel to encodings
+        """
+        self.matrix = np.ascontiguousarray(np.asarray(encodings, dtype=np.float32).reshape(-1, ENCODING_DIM))
+        self.names = list(names)
+        self.norms = _squared_norms(self.matrix)
+
+    def __len__(self):
+        return len(self.names)
+
+    def search(self, query_encodings, k=1):
+        """
+        Find the k nearest gallery entries for each query
+
+        Returns:
+            tuple: (indices, distances), both Q x k arrays
+        """
+        queries = np.asarray(query_encodings, dtype=np.float32).reshape(-1, ENCODING_DIM)
+        if len(self) == 0:
+            return np.empty((len(queries), 0), dtype=np.int64), np.empty((len(queries), 0), dtype=np.float32)
+        return _top_k(_distances(queries, self.matrix, self.norms), k)
+
+    def best_match(self, face_encoding):
+        """
+        Nearest gallery entry for one encoding
+
+        Returns:
+            tuple: (index, distance), or (None, None) for an empty gallery
+        """
+        indices, distances = self.search(face_encoding, k=1)
+        if indices.shape[1] == 0:
+            return None, None
+        return int(indices[0, 0]), float(distances[0, 0])
+
+    def best_name(self, face_encoding):
+        """
+        Name and distance of the nearest gallery entry
+
+        Returns:
+            tuple: (name, distance), or (None, None) for an empty gallery
+        """
+        index, distance = self.best_match(face_encoding)
+        if index is None:
+            return None, None
+        return self.names[index], distance
+
+    def close(self):
+        pass
+
+
+def _shard_worker(shm_name, total_rows, start, end, requests, results):
+    """Worker process: search one shard of the shared gallery matrix"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        gallery = np.ndarray((total_rows, ENCODING_DIM), dtype=np.float32, buffer=shm.buf)
+        shard = gallery[start:end]
+        norms = _squared_norms(shard)
+
+        while True:
+            request = requests.get()
+            if request is None:
+                break
+            request_id, queries, k = request
+            indices, distances = _top_k(_distances(queries, shard, norms), k)
+            results.put((request_id, indices + start, distances))
+    finally:
+        del gallery, shard
+        shm.close()
+
+
+@contextmanager
+def _hidden_main_module():
+    """
+    Start spawn/forkserver workers without re-running the calling script
+
+    Those start methods import the parent's __main__ in every worker, and
+    facePI.py runs the door loop at module level.
+    """
+    main_module = sys.modules["__main__"]
+    sys.modules["__main__"] = types.ModuleType("__main__")
+    try:
+        yield
+    finally:
+        sys.modules["__main__"] = main_module
+
+
+class ShardedMatcher(LinearMatcher):
+    def __init__(self, encodings, names, num_workers=None, timeout=5.0, poll_interval=0.5):
+        """
+        Initialize a matcher that splits the gallery across worker processes
+
+        Args:
+            encodings (ndarray): N x 128 gallery matrix
+            names (list): N names, parallel to encodings
+            num_workers (int): Number of shards / processes (default: CPU count)
+            timeout (float): Seconds to wait for all shards before answering in this process
+            poll_interval (float): Seconds between worker liveness checks while waiting
+        """
+        matrix = np.asarray(encodings, dtype=np.float32).reshape(-1, ENCODING_DIM)
+        self.names = list(names)
+        self.num_workers = max(1, min(num_workers or os.cpu_count() or 1, len(matrix)))
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+
+        # Copy the gallery into shared memory once; workers map it without copying
+        self._shm = shared_memory.SharedMemory(create=True, size=max(matrix.nbytes, 1))
+        self.matrix = np.ndarray(matrix.shape, dtype=np.float32, buffer=self._shm.buf)
+        self.matrix[:] = matrix
+
+        # Workers only need the shared memory name, so they start from a fresh
+        # interpreter instead of forking a process that already runs threads
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        self._results = context.Queue()
+        self._requests = []
+        self._workers = []
+        self._next_request_id = 0
+        self._fallback = None  # LinearMatcher used once a worker died
+        self._lock = threading.Lock()  # One request in flight at a time (shared result queue)
+
+        bounds = np.linspace(0, len(matrix), self.num_workers + 1).astype(int)
+        with _hidden_main_module():
+            for start, end in zip(bounds[:-1], bounds[1:]):
+                requests = context.Queue()
+                worker = context.Process(
+                    target=_shard_worker,
+                    args=(self._shm.name, len(matrix), int(start), int(end), requests, self._results),
+                    name=f"matcher-shard-{start}",
+                    daemon=True
+                )
+                worker.start()
+                self._requests.append(requests)
+                self._workers.append(worker)
+
+        print(f"🧩 Sharded matcher aktif: {len(matrix)} wajah di {self.num_workers} worker")
+
+    def search(self, query_encodings, k=1):
+        queries = np.asarray(query_encodings, dtype=np.float32).reshape(-1, ENCODING_DIM)
+        with self._lock:
+            if self._fallback is not None:
+                return self._fallback.search(queries, k)
+            if not self._workers:
+                raise RuntimeError("ShardedMatcher sudah ditutup")
+
+            request_id = self._next_request_id
+            self._next_request_id += 1
+
+            for requests in self._requests:
+                requests.put((request_id, queries, k))
+
+            shard_indices, shard_distances = [], []
+            deadline = time.monotonic() + self.timeout
+            while len(shard_indices) < len(self._requests):
+                try:
+                    result_id, indices, distances = self._results.get(timeout=self.poll_interval)
+                except queue.Empty:
+                    dead = [worker.name for worker in self._workers if not worker.is_alive()]
+                    if dead:
+                        print(f"⚠️  Worker matcher mati ({', '.join(dead)}) - beralih ke single-process matcher")
+                        self._switch_to_fallback()
+                        return self._fallback.search(queries, k)
+                    if time.monotonic() >= deadline:
+                        # A hung shard would stall every later query as well
+                        print(f"⚠️  Shard matcher tidak menjawab dalam {self.timeout} detik "
+                              f"- beralih ke single-process matcher")
+                        self._switch_to_fallback()
+                        return self._fallback.search(queries, k)
+                    continue
+                if result_id != request_id:
+                    continue  # Stale answer of an earlier request
+                shard_indices.append(indices)
+                shard_distances.append(distances)
+
+        # Merge the local top-k lists into the global top-k
+        indices = np.concatenate(shard_indices, axis=1)
+        distances = np.concatenate(shard_distances, axis=1)
+        order, merged = _top_k(distances, k)
+        return np.take_along_axis(indices, order, axis=1), merged
+
+    def _switch_to_fallback(self):
+        """Answer all further queries in this process and release the workers"""
+        self._fallback = LinearMatcher(np.array(self.matrix), self.names)
+        self._stop_workers()
+
+    def _stop_workers(self):
+        """Stop the workers and release the shared gallery (idempotent)"""
+        for requests in self._requests:
+            try:
+                requests.put(None)
+            except (OSError, ValueError):
+                pass
+        for worker in self._workers:
+            worker.join(timeout=2)
+            if worker.is_alive():
+                worker.terminate()
+                worker.join(timeout=1)
+            if worker.is_alive():
+                worker.kill()  # A hung or stopped worker ignores SIGTERM
+                worker.join()
+        self._requests, self._workers = [], []
+
+        if self._shm is not None:
+            if self._fallback is not None:
+                self.matrix = self._fallback.matrix
+            else:
+                del self.matrix
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def close(self):
+        """Stop the workers and release the shared gallery"""
+        with self._lock:
+            self._stop_workers()
+
+
+def create_matcher(encodings, names, num_workers=None, shard_threshold=20000):
+    """
+    Create the matcher that suits the gallery size
+
+    Args:
+        encodings (ndarray): N x 128 gallery matrix
+        names (list): N names
+        num_workers (int): Worker processes for sharding (default: CPU count)
+        shard_threshold (int): Minimum gallery size for the sharded matcher
+
+    Returns:
+        LinearMatcher | ShardedMatcher
+    """
+    num_workers = num_workers or os.cpu_count() or 1
+    if len(names) >= shard_threshold and num_workers > 1:
+        try:
+            return ShardedMatcher(encodings, names, num_workers=num_workers)
+        except Exception as e:
+            print(f"⚠️  Sharded matcher gagal ({e}) - menggunakan single-process matcher")
+    return LinearMatcher(encodings, names)
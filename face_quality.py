@@ -0,0 +1,219 @@
+"""
+Face Quality Module untuk Face Recognition System
+Penilai kualitas wajah yang murah, dijalankan sebelum encoding. Wajah yang
+blur, terlalu kecil, terlalu gelap/terang atau menghadap samping hampir tidak
+pernah cocok di bawah tolerance 0.6 - encoding-nya hanya membuang CPU dan
+menghasilkan log "Unknown". Hanya wajah yang lolos yang di-encode.
+
+Pemeriksaan (urut dari yang paling murah):
+- size      : lebar/tinggi box dalam piksel frame asli
+- exposure  : rata-rata kecerahan crop wajah
+- sharpness : variance Laplacian dari crop yang dinormalisasi ke 64x64
+- yaw       : estimasi sudut kepala dari landmark mata dan hidung, hanya
+              dihitung untuk wajah yang lolos pemeriksaan lain
+
+Shape landmark dlib yang dihitung untuk yaw disimpan di FaceQuality.landmarks
+dan diteruskan ke EncodingService, sehingga landmark tidak dihitung dua kali
+per wajah yang di-encode (model landmark gate harus sama dengan encoder).
+"""
+
+import math
+
+import cv2
+import numpy as np
+
+# Crops are resized before the Laplacian so sharpness does not depend on face size
+SHARPNESS_CROP_SIZE = 64
+
+# Depth of the nose below the eye line relative to the eye distance (average
+# adult face), used to turn the nose offset into a yaw angle
+NOSE_DEPTH_RATIO = 0.5
+
+REJECTION_REASONS = ("too_small", "too_dark", "too_bright", "blurry", "off_angle")
+
+# Point indices of the eyes and the nose tip in dlib's 5 point ("small") and
+# 68 point ("large") shapes, as used by face_recognition.face_landmarks
+LANDMARK_POINTS = {
+    "small": {"left_eye": (2, 3), "right_eye": (0, 1), "nose_tip": (4,)},
+    "large": {"left_eye": range(36, 42), "right_eye": range(42, 48), "nose_tip": range(31, 36)},
+}
+
+
+class FaceQuality:
+    """Quality assessment of one face box"""
+
+    def __init__(self, box, size, brightness, sharpness, yaw=None, reasons=None):
+        self.box = box
+        self.size = size
+        self.brightness = brightness
+        self.sharpness = sharpness
+        self.yaw = yaw
+        self.reasons = list(reasons or [])
+        self.score = 0.0
+        self.landmarks = None  # Raw dlib shape from the yaw check, reused for encoding
+
+    @property
+    def passed(self):
+        return not self.reasons
+
+
+class FaceQualityGate:
+    def __init__(self, min_face_size=80, min_sharpness=30.0, max_yaw=35.0, min_brightness=40,
+                 max_brightness=220, check_yaw=True, landmark_model="small"):
+        """
+        Initialize the quality gate
+
+        Args:
+            min_face_size (int): Minimum box width and height in full frame pixels
+            min_sharpness (float): Minimum variance of the Laplacian of the face crop
+            max_yaw (float): Maximum estimated head yaw in degrees
+            min_brightness (float): Minimum mean gray level of the face crop
+            max_brightness (float): Maximum mean gray level of the face crop
+            check_yaw (bool): Estimate yaw from landmarks (loads the dlib landmark model)
+            landmark_model (str): face_recognition landmark model ("small" or "large"),
+                keep it equal to the encoder's model so the landmarks can be reused
+        """
+        self.min_face_size = min_face_size
+        self.min_sharpness = min_sharpness
+        self.max_yaw = max_yaw
+        self.min_brightness = min_brightness
+        self.max_brightness = max_brightness
+        self.check_yaw = check_yaw
+        self.landmark_model = landmark_model
+
+        self._api = None
+        self._metrics = {"checked": 0, "passed": 0, "rejected": 0}
+        self._rejected_by_reason = {reason: 0 for reason in REJECTION_REASONS}
+
+    def filter(self, rgb_image, face_locations, scale=1.0):
+        """
+        Split detected faces into faces worth encoding and rejected faces
+
+        Args:
+            rgb_image (ndarray): RGB image the locations refer to
+            face_locations (list): (top, right, bottom, left) boxes
+            scale (float): Scale of rgb_image relative to the full camera frame
+
+        Returns:
+            tuple: (accepted boxes, FaceQuality for every box in input order)
+        """
+        qualities = [self._assess_cheap(rgb_image, box, scale) for box in face_locations]
+
+        # Landmarks are the most expensive check, only run them on faces that passed the rest
+        if self.check_yaw:
+            candidates = [quality for quality in qualities if quality.passed]
+            if candidates:
+                shapes = self._raw_landmarks(rgb_image, [quality.box for quality in candidates])
+                for quality, shape in zip(candidates, shapes):
+                    yaw = self._estimate_yaw(shape)
+                    quality.landmarks = shape
+                    quality.yaw = yaw
+                    if yaw is not None and yaw > self.max_yaw:
+                        quality.reasons.append("off_angle")
+
+        for quality in qualities:
+            quality.score = self._score(quality)
+            self._metrics["checked"] += 1
+            self._metrics["passed" if quality.passed else "rejected"] += 1
+            for reason in quality.reasons:
+                self._rejected_by_reason[reason] += 1
+
+        return [quality.box for quality in qualities if quality.passed], qualities
+
+    def assess(self, rgb_image, box, scale=1.0):
+        """Assess a single face box (see filter)"""
+        return self.filter(rgb_image, [box], scale)[1][0]
+
+    def get_metrics(self):
+        """Return pass/reject counts and rejections per reason"""
+        metrics = dict(self._metrics)
+        metrics["rejected_by_reason"] = {reason: count for reason, count in self._rejected_by_reason.items() if count}
+        metrics["pass_rate"] = round(metrics["passed"] / metrics["checked"], 3) if metrics["checked"] else 0.0
+        return metrics
+
+    def _assess_cheap(self, rgb_image, box, scale):
+        """Size, exposure and sharpness of one box"""
+        height, width = rgb_image.shape[:2]
+        top, right, bottom, left = box
+        top, left = max(int(top), 0), max(int(left), 0)
+        bottom, right = min(int(bottom), height), min(int(right), width)
+
+        size = min(right - left, bottom - top) / scale
+        if right <= left or bottom <= top:
+            return FaceQuality(box, size, 0.0, 0.0, reasons=["too_small"])
+
+        gray = cv2.cvtColor(rgb_image[top:bottom, left:right], cv2.COLOR_RGB2GRAY)
+        brightness = float(gray.mean())
+        normalized = cv2.resize(gray, (SHARPNESS_CROP_SIZE, SHARPNESS_CROP_SIZE), interpolation=cv2.INTER_AREA)
+        sharpness = float(cv2.Laplacian(normalized, cv2.CV_64F).var())
+
+        reasons = []
+        if size < self.min_face_size:
+            reasons.append("too_small")
+        if brightness < self.min_brightness:
+            reasons.append("too_dark")
+        elif brightness > self.max_brightness:
+            reasons.append("too_bright")
+        if sharpness < self.min_sharpness:
+            reasons.append("blurry")
+        return FaceQuality(box, size, brightness, sharpness, reasons=reasons)
+
+    def accepted_landmarks(self, qualities):
+        """Raw landmark shapes of the accepted faces for EncodingService, None without the yaw check"""
+        accepted = [quality for quality in qualities if quality.passed]
+        if not self.check_yaw or any(quality.landmarks is None for quality in accepted):
+            return None
+        return [quality.landmarks for quality in accepted]
+
+    def _raw_landmarks(self, rgb_image, boxes):
+        """dlib landmark shapes for the boxes (the same call EncodingService aligns with)"""
+        if self._api is None:
+            import face_recognition.api as face_recognition_api
+            self._api = face_recognition_api
+        return self._api._raw_face_landmarks(rgb_image, boxes, model=self.landmark_model)
+
+    def _estimate_yaw(self, shape):
+        """
+        Estimated yaw in degrees from the eye and nose tip landmarks
+
+        The nose sits in front of the eye line, so turning the head moves it
+        sideways relative to the eye midpoint by depth * sin(yaw) while the eye
+        distance shrinks by cos(yaw).
+        """
+        points = np.array([(point.x, point.y) for point in shape.parts()], dtype=np.float64)
+        indices = LANDMARK_POINTS[self.landmark_model]
+        left_eye = points[list(indices["left_eye"])].mean(axis=0)
+        right_eye = points[list(indices["right_eye"])].mean(axis=0)
+        nose = points[list(indices["nose_tip"])].mean(axis=0)
+        eye_distance = np.linalg.norm(right_eye - left_eye)
+        if eye_distance == 0:
+            return None
+        offset = abs(nose[0] - (left_eye[0] + right_eye[0]) / 2.0) / eye_distance
+        return math.degrees(math.atan(offset / NOSE_DEPTH_RATIO))
+
+    def _score(self, quality):
+        """Quality score in [0, 1] used to rank faces (e.g. for enrollment)"""
+        size_score = min(quality.size / (2.0 * self.min_face_size), 1.0) if self.min_face_size else 1.0
+        sharpness_score = min(quality.sharpness / (4.0 * self.min_sharpness), 1.0) if self.min_sharpness else 1.0
+        exposure_score = max(0.0, 1.0 - abs(quality.brightness - 128.0) / 128.0)
+        yaw_score = 1.0 if quality.yaw is None else max(0.0, 1.0 - quality.yaw / 90.0)
+        return round(size_score * sharpness_score * exposure_score * yaw_score, 4)
+
+
+# Test function
+if __name__ == "__main__":
+    print("🧪 Testing Face Quality Gate...")
+
+    gate = FaceQualityGate(check_yaw=False)
+    rng = np.random.RandomState(0)
+    frame = np.full((480, 640, 3), 120, dtype=np.uint8)
+    frame[100:260, 100:260] = rng.randint(60, 200, size=(160, 160, 3))  # Textured, sharp
+    frame[100:260, 400:560] = cv2.GaussianBlur(frame[100:260, 100:260], (31, 31), 10)  # Blurred copy
+    frame[400:420, 300:320] = 130  # Tiny
+
+    accepted, qualities = gate.filter(frame, [(100, 260, 260, 100), (100, 560, 260, 400), (400, 320, 420, 300)])
+    for quality in qualities:
+        print(f"   {quality.box}: size {quality.size:.0f}, sharpness {quality.sharpness:.1f}, "
+              f"brightness {quality.brightness:.0f}, score {quality.score:.3f}, reasons {quality.reasons}")
+    print(f"\n📊 Metrics: {gate.get_metrics()}")
+    print("\n✅ Test complete!")
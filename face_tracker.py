@@ -0,0 +1,186 @@
+"""
+Face Tracker Module untuk Face Recognition System
+Menghubungkan wajah antar frame (track) dan mengumpulkan vote identitas
+per track dalam sliding window. Identitas baru di-commit setelah stabil,
+dan setelah itu track dengan identitas yang dikenal tidak dicocokkan lagi ke
+galeri sampai penampilannya berubah. Track yang di-commit sebagai "Unknown"
+tetap dicocokkan dan bisa naik ke identitas yang dikenal begitu frame yang
+lebih baik masuk (misalnya orang yang mendekat ke kamera). Hasilnya: lebih sedikit false unlock karena satu frame noisy,
+dan lebih sedikit panggilan matcher/logger untuk orang yang diam di depan kamera.
+"""
+
+from collections import Counter, deque
+
+import numpy as np
+
+from face_detector import box_iou
+
+UNKNOWN_NAME = "Unknown"
+
+
+class FaceTrack:
+    def __init__(self, track_id, box, window_size=5, min_votes=3):
+        """
+        Initialize a face track
+
+        Args:
+            track_id (int): Unique id of the track
+            box (tuple): Current (top, right, bottom, left) box
+            window_size (int): Number of recent votes kept
+            min_votes (int): Votes for one identity needed to commit it
+        """
+        self.track_id = track_id
+        self.box = box
+        self.missed = 0
+        self.min_votes = min_votes
+        self.votes = deque(maxlen=window_size)  # (name, distance, encoding)
+        self.identity = None  # Committed identity (name or UNKNOWN_NAME)
+        self.distance = None  # Mean distance of the committed votes
+        self.anchor_encoding = None  # Appearance reference of the committed identity
+
+    @property
+    def is_committed(self):
+        return self.identity is not None
+
+    @property
+    def is_known(self):
+        return self.identity is not None and self.identity != UNKNOWN_NAME
+
+    def needs_matching(self, face_encoding, appearance_threshold):
+        """
+        Check whether this track must be matched against the gallery again
+
+        A track committed to a known identity keeps it while the new encoding
+        stays close to the committed appearance; otherwise the decision is reset.
+        Tracks committed as "Unknown" are always matched so they can upgrade.
+        """
+        if not self.is_known:
+            return True
+
+        appearance_distance = np.linalg.norm(self.anchor_encoding - face_encoding)
+        if appearance_distance <= appearance_threshold:
+            return False
+
+        self.reset()
+        return True
+
+    def add_vote(self, name, distance, face_encoding):
+        """
+        Add one frame's match result to the window
+
+        Returns:
+            bool: True if this vote committed an identity for the track
+                (including an upgrade from "Unknown" to a known identity)
+        """
+        self.votes.append((name, distance, face_encoding))
+        if self.is_known:
+            return False
+
+        best_name, count = Counter(vote[0] for vote in self.votes).most_common(1)[0]
+        if count < self.min_votes or best_name == self.identity:
+            return False
+
+        winning = [vote for vote in self.votes if vote[0] == best_name]
+        distances = [vote[1] for vote in winning if vote[1] is not None]
+        self.identity = best_name
+        self.distance = float(np.mean(distances)) if distances else None
+        self.anchor_encoding = np.mean([vote[2] for vote in winning], axis=0)
+        return True
+
+    def reset(self):
+        """Forget the committed identity and the collected votes"""
+        self.votes.clear()
+        self.identity = None
+        self.distance = None
+        self.anchor_encoding = None
+
+
+class FaceTracker:
+    def __init__(self, window_size=5, min_votes=3, iou_threshold=0.3, max_missed=3, appearance_threshold=0.35):
+        """
+        Initialize the face tracker
+
+        Args:
+            window_size (int): Sliding window size of match votes per track
+            min_votes (int): Votes for one identity needed to commit it
+            iou_threshold (float): Minimum box overlap to continue a track
+            max_missed (int): Processed frames a track may be missing before it is dropped
+            appearance_threshold (float): Encoding distance from the committed
+                appearance that triggers re-matching
+        """
+        self.window_size = window_size
+        self.min_votes = min_votes
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self.appearance_threshold = appearance_threshold
+        self.tracks = []
+        self._next_track_id = 1
+        self._stats = {"tracks_created": 0, "commits": 0, "matches_done": 0, "matches_skipped": 0}
+
+    def update(self, face_locations):
+        """
+        Associate the detected boxes with existing tracks
+
+        Args:
+            face_locations (list): (top, right, bottom, left) boxes of this frame
+
+        Returns:
+            list: FaceTrack for each box, in the order of face_locations
+        """
+        # Greedy association on the best overlapping pairs first
+        pairs = []
+        for t_index, track in enumerate(self.tracks):
+            for b_index, box in enumerate(face_locations):
+                iou = box_iou(track.box, box)
+                if iou >= self.iou_threshold:
+                    pairs.append((iou, t_index, b_index))
+        pairs.sort(reverse=True)
+
+        assigned = [None] * len(face_locations)
+        used_tracks = set()
+        for _, t_index, b_index in pairs:
+            if t_index in used_tracks or assigned[b_index] is not None:
+                continue
+            used_tracks.add(t_index)
+            assigned[b_index] = self.tracks[t_index]
+
+        for t_index, track in enumerate(self.tracks):
+            if t_index not in used_tracks:
+                track.missed += 1
+        self.tracks = [track for track in self.tracks if track.missed <= self.max_missed]
+
+        for b_index, box in enumerate(face_locations):
+            track = assigned[b_index]
+            if track is None:
+                track = FaceTrack(self._next_track_id, box, self.window_size, self.min_votes)
+                self._next_track_id += 1
+                self._stats["tracks_created"] += 1
+                self.tracks.append(track)
+                assigned[b_index] = track
+            track.box = box
+            track.missed = 0
+
+        return assigned
+
+    def clear(self):
+        """Drop all tracks (e.g. when the detection scale changes)"""
+        self.tracks = []
+
+    def needs_matching(self, track, face_encoding):
+        """Return True if the track must be matched against the gallery this frame"""
+        needed = track.needs_matching(face_encoding, self.appearance_threshold)
+        self._stats["matches_done" if needed else "matches_skipped"] += 1
+        return needed
+
+    def add_vote(self, track, name, distance, face_encoding):
+        """Add a match result to a track, returns True when an identity is committed"""
+        committed = track.add_vote(name, distance, face_encoding)
+        if committed:
+            self._stats["commits"] += 1
+        return committed
+
+    def get_stats(self):
+        """Return tracker statistics"""
+        stats = dict(self._stats)
+        stats["active_tracks"] = len(self.tracks)
+        return stats
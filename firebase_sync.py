@@ -0,0 +1,92 @@
+"""
+Firebase Sync Module untuk Face Recognition System
+Worker background yang mengirim log deteksi ke Firebase. Modul firebase_admin
+(lewat firebase_config) baru di-import dan terhubung saat worker dijalankan,
+sehingga tidak memperlambat start-up dan loop pengenalan wajah tidak pernah
+menunggu jaringan.
+"""
+
+import queue
+import threading
+
+
+class FirebaseSyncWorker:
+    def __init__(self, max_queue=1000):
+        """
+        Initialize the Firebase sync worker
+
+        Args:
+            max_queue (int): Maximum pending log events (oldest dropped when full)
+        """
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._logger = None
+        self.dropped = 0
+
+    @property
+    def is_connected(self):
+        return self._logger is not None and self._logger.is_connected
+
+    def start(self):
+        """Start the worker thread (connects to Firebase in the background)"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="firebase-sync", daemon=True)
+        self._thread.start()
+
+    def log_detection(self, name, **kwargs):
+        """Queue a detection log for Firebase, never blocks the caller"""
+        self._put_dropping_oldest(dict(kwargs, name=name))
+        return True
+
+    def stop(self, timeout=5):
+        """Flush pending logs and stop the worker, waiting at most timeout seconds"""
+        if self._thread is None:
+            return
+        # A full queue must not block shutdown while the worker hangs in a Firebase call
+        self._put_dropping_oldest(None)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            print(f"⚠️  Firebase sync belum selesai setelah {timeout} detik - log yang tersisa dilewati")
+        self._thread = None
+
+    def _put_dropping_oldest(self, item):
+        """Queue an item without blocking, dropping the oldest log when the queue is full"""
+        while True:
+            try:
+                self._queue.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def _run(self):
+        """Connect to Firebase, then forward queued logs"""
+        try:
+            # Heavy import (firebase_admin + google libraries) happens here, off the main thread
+            from firebase_config import firebase_logger
+            self._logger = firebase_logger
+            if firebase_logger.is_connected:
+                print("🔥 Firebase: Terhubung")
+            else:
+                print("⚠️  Firebase: Tidak terhubung (hanya CSV yang akan digunakan)")
+        except Exception as e:
+            print(f"⚠️  Firebase tidak tersedia ({e}) - hanya CSV yang akan digunakan")
+
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            if self._logger is None:
+                continue
+            try:
+                self._logger.log_detection(**item)
+            except Exception as e:
+                print(f"❌ Error sync ke Firebase: {e}")
+
+
+# Global Firebase sync worker instance
+firebase_sync = FirebaseSyncWorker()
@@ -0,0 +1,340 @@
+"""
+Gallery Benchmark untuk Face Recognition System
+Mengukur bagaimana pencocokan wajah berskala terhadap ukuran galeri, tanpa
+kamera dan tanpa foto. Galeri dan query 128-d dibuat sintetis dengan sebaran
+jarak yang mirip encoding dlib asli (jarak orang yang sama ~0.3-0.5, orang
+berbeda ~0.8-1.0), lalu setiap matcher diukur latency per query, memori dan
+akurasi identifikasinya pada tolerance 0.6.
+
+Matcher yang diukur:
+- face_distance   : pendekatan awal facePI (face_recognition.face_distance + argmin)
+- linear          : face_matcher.LinearMatcher
+- sharded         : face_matcher.ShardedMatcher (beberapa worker process)
+- gallery_float16 : GalleryFile.face_distance pada galeri float16 (memmap)
+- gallery_int8    : GalleryFile.face_distance pada galeri int8 (memmap)
+
+Usage:
+    python gallery_benchmark.py
+    python gallery_benchmark.py --sizes 1000,10000,100000 --queries 500 --json gallery_bench.json
+    python gallery_benchmark.py --matchers linear,sharded --workers 4 --label v2.3
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from face_matcher import LinearMatcher, ShardedMatcher
+from gallery_store import GalleryFile, pairwise_distances, write_gallery
+from replay_benchmark import summarize_timings
+
+ENCODING_DIM = 128
+MATCHERS = ("face_distance", "linear", "sharded", "gallery_float16", "gallery_int8")
+
+# Per-dimension spread of identity centers and of samples around them, chosen so
+# that distances follow dlib encodings: inter-class ~0.9, intra-class ~0.4
+IDENTITY_SPREAD = 0.05
+SAMPLE_SPREAD = 0.025
+
+
+def generate_gallery(num_identities, seed=0):
+    """
+    Synthetic gallery with one enrolled encoding per identity
+
+    Returns:
+        tuple: (identity centers, N x 128 enrolled encodings, per-identity sample spread)
+    """
+    rng = np.random.RandomState(seed)
+    centers = rng.normal(scale=IDENTITY_SPREAD, size=(num_identities, ENCODING_DIM))
+    # Some people vary more between photos (glasses, lighting, age) than others
+    spreads = SAMPLE_SPREAD * rng.lognormal(sigma=0.25, size=num_identities)
+    enrolled = centers + rng.normal(size=(num_identities, ENCODING_DIM)) * spreads[:, np.newaxis]
+    return centers, enrolled.astype(np.float32), spreads
+
+
+def generate_queries(centers, spreads, num_queries, impostor_fraction=0.2, seed=1):
+    """
+    Genuine queries (new samples of enrolled people) plus impostors (not enrolled)
+
+    Returns:
+        tuple: (Q x 128 queries, Q true identity indices, -1 for impostors)
+    """
+    rng = np.random.RandomState(seed)
+    num_impostors = int(round(num_queries * impostor_fraction))
+    num_genuine = num_queries - num_impostors
+
+    identities = rng.randint(0, len(centers), size=num_genuine)
+    genuine = centers[identities] + rng.normal(size=(num_genuine, ENCODING_DIM)) * spreads[identities, np.newaxis]
+    impostors = rng.normal(scale=IDENTITY_SPREAD, size=(num_impostors, ENCODING_DIM))
+    impostors += rng.normal(scale=SAMPLE_SPREAD, size=impostors.shape)
+
+    queries = np.vstack([genuine, impostors]).astype(np.float32)
+    labels = np.concatenate([identities, np.full(num_impostors, -1)])
+    return queries, labels
+
+
+def distance_spread(enrolled, queries, labels, sample=500):
+    """Intra/inter-class distance statistics of the synthetic data (sanity check)"""
+    genuine = np.flatnonzero(labels >= 0)[:sample]
+    distances = pairwise_distances(queries[genuine].astype(np.float64), enrolled.astype(np.float64))
+    intra = distances[np.arange(len(genuine)), labels[genuine]]
+    mask = np.ones(distances.shape, dtype=bool)
+    mask[np.arange(len(genuine)), labels[genuine]] = False
+    inter = distances[mask]
+    return {
+        "intra_mean": round(float(intra.mean()), 4),
+        "intra_p95": round(float(np.percentile(intra, 95)), 4),
+        "inter_mean": round(float(inter.mean()), 4),
+        "inter_p05": round(float(np.percentile(inter, 5)), 4),
+    }
+
+
+class FaceDistanceMatcher:
+    """The original facePI matching: face_distance over the whole gallery, then argmin"""
+
+    def __init__(self, encodings):
+        self.matrix = np.asarray(encodings, dtype=np.float32)
+        try:
+            import face_recognition
+            self._face_distance = face_recognition.face_distance
+            self.implementation = "face_recognition"
+        except ImportError:
+            # face_recognition.face_distance is this exact expression
+            self._face_distance = lambda faces, face: np.linalg.norm(faces - face, axis=1)
+            self.implementation = "numpy"
+
+    @property
+    def nbytes(self):
+        return self.matrix.nbytes
+
+    def best_match(self, face_encoding):
+        distances = self._face_distance(self.matrix, face_encoding)
+        index = int(np.argmin(distances))
+        return index, float(distances[index])
+
+    def close(self):
+        pass
+
+
+class GalleryFileMatcher:
+    """Chunked face_distance on a memory-mapped reduced precision gallery file"""
+
+    def __init__(self, encodings, precision, work_dir):
+        path = os.path.join(work_dir, f"bench_{precision}.gallery")
+        write_gallery(path, encodings, [str(i) for i in range(len(encodings))], precision=precision)
+        self.gallery = GalleryFile(path)
+        self.implementation = f"GalleryFile ({precision})"
+
+    @property
+    def nbytes(self):
+        return self.gallery.nbytes
+
+    def best_match(self, face_encoding):
+        distances = self.gallery.face_distance(face_encoding)
+        index = int(np.argmin(distances))
+        return index, float(distances[index])
+
+    def close(self):
+        del self.gallery
+
+
+def create_benchmark_matcher(kind, encodings, work_dir, num_workers):
+    """Build one matcher under test, returns (matcher, index bytes, implementation)"""
+    names = [str(i) for i in range(len(encodings))]
+    if kind == "face_distance":
+        matcher = FaceDistanceMatcher(encodings)
+        return matcher, matcher.nbytes, matcher.implementation
+    if kind == "linear":
+        matcher = LinearMatcher(encodings, names)
+        return matcher, matcher.matrix.nbytes + matcher.norms.nbytes, "LinearMatcher"
+    if kind == "sharded":
+        matcher = ShardedMatcher(encodings, names, num_workers=num_workers)
+        return matcher, matcher.matrix.nbytes, f"ShardedMatcher ({matcher.num_workers} worker)"
+    if kind == "gallery_float16":
+        matcher = GalleryFileMatcher(encodings, "float16", work_dir)
+        return matcher, matcher.nbytes, matcher.implementation
+    if kind == "gallery_int8":
+        matcher = GalleryFileMatcher(encodings, "int8", work_dir)
+        return matcher, matcher.nbytes, matcher.implementation
+    raise ValueError(f"Matcher tidak dikenal: {kind}")
+
+
+def score_predictions(predictions, distances, labels, tolerance):
+    """Identification accuracy figures of one matcher at the given tolerance"""
+    genuine = labels >= 0
+    accepted = distances <= tolerance
+    correct = predictions == labels
+    return {
+        "identification_rate": round(float(np.mean(accepted[genuine] & correct[genuine])), 4),
+        "false_reject_rate": round(float(np.mean(~accepted[genuine])), 4),
+        "misidentification_rate": round(float(np.mean(accepted[genuine] & ~correct[genuine])), 4),
+        "false_accept_rate": round(float(np.mean(accepted[~genuine])), 4) if np.any(~genuine) else None,
+    }
+
+
+def benchmark_matcher(kind, enrolled, queries, labels, work_dir, num_workers=4, tolerance=0.6, memory_queries=20):
+    """
+    Build one matcher and time / score every query against it
+
+    Latency is measured with tracemalloc off (tracing slows Python code down,
+    most of all the pickling of the sharded matcher). Peak memory of the build
+    and of memory_queries queries is measured in a separate traced pass.
+    """
+    build_start = time.perf_counter()
+    matcher, index_bytes, implementation = create_benchmark_matcher(kind, enrolled, work_dir, num_workers)
+    build_s = time.perf_counter() - build_start
+
+    try:
+        matcher.best_match(queries[0])  # Warm-up
+        predictions = np.empty(len(queries), dtype=np.int64)
+        distances = np.empty(len(queries), dtype=np.float64)
+        timings = []
+        for i, query in enumerate(queries):
+            start = time.perf_counter()
+            predictions[i], distances[i] = matcher.best_match(query)
+            timings.append(time.perf_counter() - start)
+    finally:
+        matcher.close()
+
+    build_peak, query_peak = measure_peak_memory(kind, enrolled, queries[:memory_queries], work_dir, num_workers)
+
+    result = {
+        "matcher": kind,
+        "implementation": implementation,
+        "gallery_size": len(enrolled),
+        "queries": len(queries),
+        "build_s": round(build_s, 3),
+        "index_bytes": int(index_bytes),
+        "bytes_per_identity": round(index_bytes / len(enrolled), 1),
+        "build_peak_bytes": int(build_peak),
+        "query_peak_bytes": int(query_peak),
+        "qps": round(len(timings) / sum(timings), 1),
+    }
+    result.update(summarize_timings(timings))
+    result.update(score_predictions(predictions, distances, labels, tolerance))
+    return result
+
+
+def measure_peak_memory(kind, enrolled, queries, work_dir, num_workers):
+    """Traced peak bytes of building the matcher and of answering the queries"""
+    tracemalloc.start()
+    try:
+        matcher, _, _ = create_benchmark_matcher(kind, enrolled, work_dir, num_workers)
+        _, build_peak = tracemalloc.get_traced_memory()
+        try:
+            matcher.best_match(queries[0])  # Warm-up
+            tracemalloc.reset_peak()
+            for query in queries:
+                matcher.best_match(query)
+            _, query_peak = tracemalloc.get_traced_memory()
+        finally:
+            matcher.close()
+    finally:
+        tracemalloc.stop()
+    return build_peak, query_peak
+
+
+def run_gallery_benchmark(sizes=(1000, 10000, 100000), matchers=MATCHERS, num_queries=200, num_workers=4,
+                          tolerance=0.6, seed=0):
+    """
+    Benchmark every matcher on synthetic galleries of every size
+
+    Returns:
+        dict: Machine, config, distance spread per size and one result per (size, matcher)
+    """
+    work_dir = tempfile.mkdtemp(prefix="facerec_gallery_bench_")
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "cpu_count": os.cpu_count(),
+        },
+        "config": {"sizes": list(sizes), "matchers": list(matchers), "queries": num_queries,
+                   "workers": num_workers, "tolerance": tolerance, "seed": seed},
+        "distance_spread": {},
+        "results": [],
+    }
+
+    try:
+        for size in sizes:
+            centers, enrolled, spreads = generate_gallery(size, seed=seed)
+            queries, labels = generate_queries(centers, spreads, num_queries, seed=seed + 1)
+            spread = distance_spread(enrolled, queries, labels)
+            report["distance_spread"][str(size)] = spread
+            print(f"\n🧪 Galeri {size} identitas - jarak intra {spread['intra_mean']:.3f} "
+                  f"(p95 {spread['intra_p95']:.3f}), inter {spread['inter_mean']:.3f} (p5 {spread['inter_p05']:.3f})")
+
+            for kind in matchers:
+                if kind == "sharded" and num_workers <= 1:
+                    continue
+                result = benchmark_matcher(kind, enrolled, queries, labels, work_dir, num_workers, tolerance)
+                report["results"].append(result)
+                print(f"   {kind:<16} {result['mean_ms']:>8.3f} ms/query (p95 {result['p95_ms']:.3f}) "
+                      f"{result['index_bytes'] / 1e6:>8.1f} MB  identifikasi {result['identification_rate']:.3f}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return report
+
+
+def print_results(report):
+    """Print benchmark results as a table"""
+    print("\n📈 HASIL BENCHMARK GALERI:")
+    print("=" * 92)
+    print(f"{'Galeri':>7} {'Matcher':<16} {'Mean ms':>9} {'P95 ms':>9} {'QPS':>9} {'Index MB':>9} "
+          f"{'Peak MB':>8} {'Ident.':>7} {'FRR':>6} {'FAR':>6}")
+    print("-" * 92)
+    for result in report["results"]:
+        far = f"{result['false_accept_rate']:.3f}" if result['false_accept_rate'] is not None else "N/A"
+        print(f"{result['gallery_size']:>7} {result['matcher']:<16} {result['mean_ms']:>9.3f} "
+              f"{result['p95_ms']:>9.3f} {result['qps']:>9.1f} {result['index_bytes'] / 1e6:>9.2f} "
+              f"{result['query_peak_bytes'] / 1e6:>8.2f} {result['identification_rate']:>7.3f} "
+              f"{result['false_reject_rate']:>6.3f} {far:>6}")
+    print("=" * 92)
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Benchmark skalabilitas pencocokan galeri wajah (data sintetis)")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Ukuran galeri dipisah koma")
+    parser.add_argument("--matchers", default=",".join(MATCHERS), help="Matcher dipisah koma")
+    parser.add_argument("--queries", type=int, default=200, help="Jumlah query per ukuran galeri")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1), help="Worker untuk sharded")
+    parser.add_argument("--tolerance", type=float, default=0.6)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--label", help="Label rilis yang disimpan di JSON (misal v2.3)")
+    parser.add_argument("--json", help="Simpan hasil ke file JSON")
+    args = parser.parse_args()
+
+    matchers = args.matchers.split(",")
+    unknown = set(matchers) - set(MATCHERS)
+    if unknown:
+        parser.error(f"Matcher tidak dikenal: {', '.join(sorted(unknown))}")
+
+    report = run_gallery_benchmark(
+        sizes=[int(size) for size in args.sizes.split(",")],
+        matchers=matchers,
+        num_queries=args.queries,
+        num_workers=args.workers,
+        tolerance=args.tolerance,
+        seed=args.seed
+    )
+    report["label"] = args.label
+    print_results(report)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+        print(f"💾 Hasil disimpan ke: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
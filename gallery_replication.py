@@ -0,0 +1,518 @@
+"""
+Gallery Replication Module untuk Face Recognition System
+Replikasi galeri antar beberapa unit pintu tanpa mengirim atau meng-encode
+ulang foto. Satu node (publisher) membandingkan galerinya dengan versi terakhir
+yang dipublikasikan dan menulis delta berversi berisi identitas yang ditambah,
+diubah atau dihapus beserta encoding 128-d-nya. Node lain (follower) hanya
+menarik dan menerapkan delta sejak versi terakhir yang sudah diterapkan.
+
+Layout direktori replikasi (shared folder / NFS / SMB):
+    manifest.json            versi terakhir + digest encoding per identitas
+    delta_00000001.json      {"version": 1, "changes": [{"op": "upsert", ...}]}
+    delta_00000002.json      ...
+
+Transport: direktori bersama, atau HTTP/HTTPS (`serve`) sebagai pengganti lokal.
+Server replikasi memakai token bersama seperti match server: start di alamat
+selain loopback ditolak tanpa token, dan follower menolak URL selain loopback
+tanpa token, karena delta berisi template biometrik yang langsung dipakai
+untuk membuka pintu.
+
+Usage:
+    python gallery_replication.py publish known_faces.gallery /mnt/share/gallery_repl
+    GALLERY_REPLICATION_TOKEN=<rahasia> python gallery_replication.py serve /mnt/share/gallery_repl \
+        --host 0.0.0.0 --port 8766 --certfile server.crt --keyfile server.key
+    GALLERY_REPLICATION_TOKEN=<rahasia> python gallery_replication.py follow known_faces.gallery \
+        https://10.0.0.5:8766 --cafile server.crt
+    python gallery_replication.py follow known_faces.gallery /mnt/share/gallery_repl --interval 30
+    python gallery_replication.py selftest
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import socket
+import ssl
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from gallery_store import ENCODING_DIM, GalleryFile, write_gallery
+from match_server import (bearer_token_matches, decode_vectors, encode_vectors, is_loopback_host,
+                          wrap_server_tls)
+
+MANIFEST_FILE = "manifest.json"
+DELTA_FILE_FORMAT = "delta_{:08d}.json"
+
+
+def _write_json_atomic(path, payload):
+    """Write JSON via a temporary file so readers never see a partial file"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        json.dump(payload, file, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def identity_digest(encodings):
+    """Stable digest of one identity's encodings (float32 bytes)"""
+    return hashlib.sha1(np.asarray(encodings, dtype=np.float32).reshape(-1, ENCODING_DIM).tobytes()).hexdigest()
+
+
+def load_identities(gallery_path):
+    """
+    Group the rows of a gallery file by identity
+
+    Returns:
+        tuple: (dict name -> N x 128 float32 array in gallery order, precision)
+    """
+    if not os.path.exists(gallery_path):
+        return {}, "float32"
+    gallery = GalleryFile(gallery_path)
+    matrix = np.asarray(gallery.matrix(), dtype=np.float32)
+    rows = {}
+    for index, name in enumerate(gallery.names):
+        rows.setdefault(name, []).append(index)
+    return {name: matrix[indices] for name, indices in rows.items()}, gallery.precision
+
+
+def write_identities(gallery_path, identities, precision="float32"):
+    """Write identities (dict name -> encodings) back as a packed gallery file"""
+    encodings = [np.asarray(e, dtype=np.float32).reshape(-1, ENCODING_DIM) for e in identities.values()]
+    names = [name for name, e in zip(identities, encodings) for _ in range(len(e))]
+    matrix = np.vstack(encodings) if encodings else np.empty((0, ENCODING_DIM), dtype=np.float32)
+    write_gallery(gallery_path, matrix, names, precision=precision)
+
+
+def diff_identities(published, identities):
+    """
+    Changes needed to go from the published digests to the current identities
+
+    Args:
+        published (dict): name -> digest of the last published version
+        identities (dict): name -> encodings of the current gallery
+
+    Returns:
+        list: Delta changes, upserts first (in gallery order), then removals
+    """
+    changes = []
+    for name, encodings in identities.items():
+        if published.get(name) != identity_digest(encodings):
+            changes.append({"op": "upsert", "name": name, "encodings": encode_vectors(encodings)})
+    for name in published:
+        if name not in identities:
+            changes.append({"op": "remove", "name": name})
+    return changes
+
+
+def apply_changes(identities, changes):
+    """Apply delta changes to identities in place (idempotent)"""
+    for change in changes:
+        if change["op"] == "upsert":
+            identities[change["name"]] = decode_vectors(change["encodings"])
+        elif change["op"] == "remove":
+            identities.pop(change["name"], None)
+        else:
+            raise ValueError(f"Operasi delta tidak dikenal: {change['op']}")
+
+
+class DirectoryTransport:
+    def __init__(self, root):
+        """
+        Replication log in a (shared) directory
+
+        Args:
+            root (str): Directory holding manifest.json and the delta files
+        """
+        self.root = root
+
+    def read_manifest(self):
+        """Return the manifest, or an empty version 0 manifest"""
+        path = os.path.join(self.root, MANIFEST_FILE)
+        if not os.path.exists(path):
+            return {"version": 0, "identities": {}}
+        with open(path, 'r', encoding='utf-8') as file:
+            return json.load(file)
+
+    def head_version(self):
+        return int(self.read_manifest()["version"])
+
+    def read_deltas(self, since):
+        """Return all deltas with a version above since, in version order"""
+        deltas = []
+        for version in range(since + 1, self.head_version() + 1):
+            with open(os.path.join(self.root, DELTA_FILE_FORMAT.format(version)), 'r', encoding='utf-8') as file:
+                deltas.append(json.load(file))
+        return deltas
+
+    def write_delta(self, delta, identities):
+        """Append a delta and move the manifest to its version (delta first, so readers never miss one)"""
+        os.makedirs(self.root, exist_ok=True)
+        _write_json_atomic(os.path.join(self.root, DELTA_FILE_FORMAT.format(delta["version"])), delta)
+        _write_json_atomic(os.path.join(self.root, MANIFEST_FILE),
+                           {"version": delta["version"], "updated_at": delta["created_at"], "identities": identities})
+
+
+class HttpTransport:
+    def __init__(self, base_url, timeout=5, token=None, cafile=None):
+        """
+        Read-only replication log served by ReplicationServer
+
+        Args:
+            base_url (str): URL of the replication server (e.g. https://10.0.0.5:8766)
+            timeout (float): HTTP timeout per request in seconds
+            token (str): Shared secret of the replication server (mandatory off loopback)
+            cafile (str): CA / self-signed certificate that signed the server's TLS certificate
+        """
+        if not token and not is_loopback_host(urlparse(base_url).hostname or ""):
+            raise ValueError(f"Server replikasi {base_url} butuh token (GALLERY_REPLICATION_TOKEN)")
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.token = token
+        self._ssl_context = ssl.create_default_context(cafile=cafile) if cafile else None
+
+    def _get(self, path):
+        headers = {"Authorization": f"Bearer {self.token}"} if self.token else {}
+        request = urllib.request.Request(self.base_url + path, headers=headers)
+        with urllib.request.urlopen(request, timeout=self.timeout, context=self._ssl_context) as response:
+            return json.loads(response.read().decode("utf-8"))
+
+    def head_version(self):
+        return int(self._get("/head")["version"])
+
+    def read_deltas(self, since):
+        return self._get(f"/deltas?since={int(since)}")["deltas"]
+
+
+def open_transport(source, token=None, cafile=None):
+    """DirectoryTransport for paths, HttpTransport for http(s) URLs"""
+    if source.startswith("http://") or source.startswith("https://"):
+        return HttpTransport(source, token=token, cafile=cafile)
+    return DirectoryTransport(source)
+
+
+class GalleryPublisher:
+    def __init__(self, gallery_path, replication_dir, node_name=None):
+        """
+        Initialize the publishing side
+
+        Args:
+            gallery_path (str): Gallery file that is the source of truth
+            replication_dir (str): Directory the deltas are written to
+            node_name (str): Recorded in each delta (default: host name)
+        """
+        self.gallery_path = gallery_path
+        self.transport = DirectoryTransport(replication_dir)
+        self.node_name = node_name or socket.gethostname()
+
+    def publish(self):
+        """
+        Publish the gallery changes since the last version
+
+        Returns:
+            int: New version, or None when nothing changed
+        """
+        manifest = self.transport.read_manifest()
+        identities, _ = load_identities(self.gallery_path)
+        changes = diff_identities(manifest["identities"], identities)
+        if not changes:
+            return None
+
+        version = int(manifest["version"]) + 1
+        delta = {
+            "version": version,
+            "created_at": time.time(),
+            "node": self.node_name,
+            "changes": changes,
+        }
+        self.transport.write_delta(delta, {name: identity_digest(e) for name, e in identities.items()})
+
+        upserts = sum(1 for change in changes if change["op"] == "upsert")
+        print(f"📤 Galeri dipublikasikan: versi {version} ({upserts} tambah/ubah, {len(changes) - upserts} hapus)")
+        return version
+
+
+class GalleryFollower:
+    def __init__(self, gallery_path, source, state_path=None, token=None, cafile=None):
+        """
+        Initialize the following side
+
+        Args:
+            gallery_path (str): Local gallery file the deltas are applied to
+            source (str): Replication directory or replication server URL
+            state_path (str): File holding the last applied version
+            token (str): Shared secret of a replication server
+            cafile (str): Certificate the replication server's TLS certificate is checked against
+        """
+        self.gallery_path = gallery_path
+        self.transport = open_transport(source, token, cafile)
+        self.state_path = state_path or gallery_path + ".replica"
+        self.version = self._load_version()
+
+        self._updated = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self.stats = {"syncs": 0, "deltas_applied": 0, "errors": 0}
+
+    def sync(self):
+        """
+        Pull and apply the deltas since the last applied version
+
+        Returns:
+            int: Number of deltas applied
+        """
+        self.stats["syncs"] += 1
+        if self.transport.head_version() <= self.version:
+            return 0
+
+        deltas = self.transport.read_deltas(self.version)
+        for expected, delta in enumerate(deltas, start=self.version + 1):
+            if delta["version"] != expected:
+                raise ValueError(f"Delta versi {expected} hilang dari log replikasi")
+
+        identities, precision = load_identities(self.gallery_path)
+        for delta in deltas:
+            apply_changes(identities, delta["changes"])
+
+        # Gallery first, then the version: a crash in between re-applies the same
+        # (idempotent) deltas on the next sync
+        write_identities(self.gallery_path, identities, precision)
+        self.version = deltas[-1]["version"]
+        self._save_version()
+
+        self.stats["deltas_applied"] += len(deltas)
+        self._updated.set()
+        print(f"📥 Galeri direplikasi ke versi {self.version} ({len(deltas)} delta, {len(identities)} identitas)")
+        return len(deltas)
+
+    def start(self, interval=30):
+        """Sync in a background thread every interval seconds"""
+        self._thread = threading.Thread(target=self._sync_loop, args=(interval,), name="gallery-follower", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def take_update(self):
+        """Return True once after the local gallery file was updated"""
+        if self._updated.is_set():
+            self._updated.clear()
+            return True
+        return False
+
+    def _sync_loop(self, interval):
+        while not self._stop_event.is_set():
+            try:
+                self.sync()
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"⚠️  Replikasi galeri gagal: {e}")
+            self._stop_event.wait(interval)
+
+    def _load_version(self):
+        if not os.path.exists(self.state_path):
+            return 0
+        with open(self.state_path, 'r', encoding='utf-8') as file:
+            return int(json.load(file)["version"])
+
+    def _save_version(self):
+        _write_json_atomic(self.state_path, {"version": self.version, "synced_at": time.time()})
+
+
+class ReplicationServer:
+    def __init__(self, replication_dir, host="127.0.0.1", port=8766, token=None, certfile=None, keyfile=None):
+        """
+        Serve a replication directory over HTTP (read-only)
+
+        Args:
+            replication_dir (str): Directory written by GalleryPublisher
+            host (str): Interface to listen on
+            port (int): TCP port
+            token (str): Shared secret required on every request (mandatory off loopback)
+            certfile (str): TLS certificate, serves HTTPS together with keyfile
+            keyfile (str): TLS private key
+        """
+        if not token and not is_loopback_host(host):
+            raise ValueError(f"Server replikasi di {host} butuh token (--token / GALLERY_REPLICATION_TOKEN)")
+
+        self.transport = DirectoryTransport(replication_dir)
+        self.token = token
+        self.httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self.scheme = wrap_server_tls(self.httpd, certfile, keyfile)
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"{self.scheme}://{host}:{port}"
+
+    def start(self):
+        """Serve in a background thread (used for localhost tests)"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="replication-server", daemon=True)
+        self._thread.start()
+
+    def serve_forever(self):
+        print(f"🌐 Server replikasi galeri berjalan di {self.url}")
+        try:
+            self.httpd.serve_forever()
+        except KeyboardInterrupt:
+            print("🛑 Server replikasi dihentikan")
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        if self._thread is not None:
+            self.httpd.shutdown()
+            self._thread.join()
+            self._thread = None
+        self.httpd.server_close()
+
+    def _make_handler(self):
+        server = self
+        transport = self.transport
+
+        class ReplicationRequestHandler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status, payload):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if not bearer_token_matches(server.token, self.headers.get("Authorization")):
+                    self._send_json(401, {"error": "unauthorized"})
+                    return
+                parsed = urlparse(self.path)
+                try:
+                    if parsed.path == "/head":
+                        self._send_json(200, {"version": transport.head_version()})
+                    elif parsed.path == "/deltas":
+                        try:
+                            since = int(parse_qs(parsed.query).get("since", ["0"])[0])
+                        except ValueError as e:
+                            self._send_json(400, {"error": str(e)})
+                            return
+                        self._send_json(200, {"deltas": transport.read_deltas(since)})
+                    else:
+                        self._send_json(404, {"error": "not found"})
+                except (OSError, ValueError) as e:
+                    self._send_json(500, {"error": str(e)})
+
+        return ReplicationRequestHandler
+
+
+def selftest():
+    """Publish to a temporary directory and follow it directly and over HTTP"""
+    import tempfile
+
+    work_dir = tempfile.mkdtemp(prefix="facerec_repl_")
+    repl_dir = os.path.join(work_dir, "repl")
+    publisher_gallery = os.path.join(work_dir, "publisher.gallery")
+    rng = np.random.RandomState(0)
+
+    identities = {f"Person_{i}": rng.normal(scale=0.09, size=(2, ENCODING_DIM)) for i in range(50)}
+    write_identities(publisher_gallery, identities)
+    publisher = GalleryPublisher(publisher_gallery, repl_dir)
+    publisher.publish()
+
+    server = ReplicationServer(repl_dir, port=0, token="selftest-token")
+    server.start()
+    try:
+        GalleryFollower(os.path.join(work_dir, "intruder.gallery"), server.url, token="wrong").sync()
+        print("Token salah ditolak: False")
+    except urllib.error.HTTPError as e:
+        print(f"Token salah ditolak: {e.code == 401}")
+
+    followers = [GalleryFollower(os.path.join(work_dir, "door_a.gallery"), repl_dir),
+                 GalleryFollower(os.path.join(work_dir, "door_b.gallery"), server.url, token="selftest-token")]
+    for follower in followers:
+        follower.sync()
+
+    # New hire, an updated identity and a leaver
+    identities["New_Hire"] = rng.normal(scale=0.09, size=(1, ENCODING_DIM))
+    identities["Person_3"] = rng.normal(scale=0.09, size=(3, ENCODING_DIM))
+    del identities["Person_7"]
+    write_identities(publisher_gallery, identities)
+    publisher.publish()
+    print(f"Publish tanpa perubahan: {publisher.publish()}")
+
+    expected = load_identities(publisher_gallery)[0]
+    for follower in followers:
+        applied = follower.sync()
+        replica = load_identities(follower.gallery_path)[0]
+        same = replica.keys() == expected.keys() and all(np.array_equal(replica[n], expected[n]) for n in expected)
+        print(f"{follower.gallery_path}: versi {follower.version}, {applied} delta, sama dengan publisher: {same}")
+
+    server.shutdown()
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Replikasi galeri wajah antar unit pintu")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    publish_parser = subparsers.add_parser("publish", help="Tulis delta dari galeri lokal")
+    publish_parser.add_argument("gallery")
+    publish_parser.add_argument("replication_dir")
+
+    follow_parser = subparsers.add_parser("follow", help="Terapkan delta ke galeri lokal")
+    follow_parser.add_argument("gallery")
+    follow_parser.add_argument("source", help="Direktori replikasi atau URL server replikasi")
+    follow_parser.add_argument("--interval", type=float, default=0, help="Ulangi tiap N detik (0 = sekali)")
+    follow_parser.add_argument("--token", default=os.environ.get("GALLERY_REPLICATION_TOKEN"),
+                               help="Token server replikasi (default: env GALLERY_REPLICATION_TOKEN)")
+    follow_parser.add_argument("--cafile", default=os.environ.get("GALLERY_REPLICATION_CAFILE"),
+                               help="Sertifikat CA server replikasi (HTTPS)")
+
+    serve_parser = subparsers.add_parser("serve", help="Sajikan direktori replikasi lewat HTTP")
+    serve_parser.add_argument("replication_dir")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8766)
+    serve_parser.add_argument("--token", default=os.environ.get("GALLERY_REPLICATION_TOKEN"),
+                              help="Token rahasia bersama (default: env GALLERY_REPLICATION_TOKEN)")
+    serve_parser.add_argument("--certfile", help="Sertifikat TLS (HTTPS)")
+    serve_parser.add_argument("--keyfile", help="Private key TLS")
+
+    subparsers.add_parser("selftest", help="Uji publisher + follower di direktori sementara")
+    args = parser.parse_args()
+
+    if args.command == "publish":
+        if GalleryPublisher(args.gallery, args.replication_dir).publish() is None:
+            print("✅ Tidak ada perubahan galeri")
+    elif args.command == "follow":
+        try:
+            follower = GalleryFollower(args.gallery, args.source, token=args.token, cafile=args.cafile)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return
+        while True:
+            follower.sync()
+            if args.interval <= 0:
+                break
+            time.sleep(args.interval)
+        print(f"✅ Galeri lokal pada versi {follower.version}")
+    elif args.command == "serve":
+        try:
+            server = ReplicationServer(args.replication_dir, args.host, args.port, token=args.token,
+                                       certfile=args.certfile, keyfile=args.keyfile)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return
+        if server.scheme == "http" and not is_loopback_host(args.host):
+            print("⚠️  Tanpa --certfile token dan encoding dikirim sebagai plain text di jaringan")
+        server.serve_forever()
+    elif args.command == "selftest":
+        selftest()
+
+
+if __name__ == "__main__":
+    main()
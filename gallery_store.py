@@ -0,0 +1,407 @@
+"""
+Gallery Store Module untuk Face Recognition System
+Format file galeri yang ringkas dan bisa di-memory-map (np.memmap), sehingga
+beberapa proses (kamera, dashboard, tools) bisa membaca galeri yang sama
+tanpa menyalin dan tanpa encoding ulang foto di setiap start.
+
+Layout file (.gallery):
+    [header 64 byte]  magic, versi, presisi, jumlah wajah, dimensi, skala int8,
+                      offset dan panjang tabel nama
+    [matrix]          N x 128 encoding (float32 / float16 / int8 terkuantisasi)
+    [tabel nama]      JSON {"names": [...], "ids": [...], "sources": [...], "skipped_photos": {...}}
+
+Galeri adalah sumber kebenaran. Setiap baris mencatat asalnya di "sources":
+[nama file foto, mtime] untuk baris dari foto di known_faces/, null untuk
+baris yang di-enroll dengan cara lain (promosi cluster 'N', /enroll match
+server, replikasi). Saat start hanya foto yang baru/berubah yang di-encode;
+baris yang bukan dari foto tidak pernah dihapus.
+
+Usage:
+    python gallery_store.py build known_faces known_faces.gallery --precision float16
+    python gallery_store.py info known_faces.gallery
+    python gallery_store.py report known_faces.gallery
+"""
+
+import argparse
+import json
+import os
+import struct
+
+import numpy as np
+
+GALLERY_MAGIC = b"FRGALLRY"
+GALLERY_VERSION = 1
+HEADER_SIZE = 64
+HEADER_FORMAT = "<8sIIIIfQQ"
+ENCODING_DIM = 128
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+PRECISIONS = {
+    "float32": (0, np.float32),
+    "float16": (1, np.float16),
+    "int8": (2, np.int8),
+}
+PRECISION_NAMES = {code: name for name, (code, _) in PRECISIONS.items()}
+
+
+def list_photos(folder_path):
+    """Return {file name: modification time} of the photos in a folder"""
+    if not os.path.exists(folder_path):
+        return {}
+    return {file: os.path.getmtime(os.path.join(folder_path, file))
+            for file in sorted(os.listdir(folder_path)) if file.lower().endswith(IMAGE_EXTENSIONS)}
+
+
+def encode_photo(image_path):
+    """Return the encoding of the first face in a photo, None if it has no face"""
+    import face_recognition
+
+    face_encodings = face_recognition.face_encodings(face_recognition.load_image_file(image_path))
+    return face_encodings[0] if face_encodings else None
+
+
+def quantize(encodings, precision):
+    """
+    Convert float encodings to the stored precision
+
+    Returns:
+        tuple: (stored matrix, scale) - scale is only used for int8
+    """
+    encodings = np.asarray(encodings, dtype=np.float32).reshape(-1, ENCODING_DIM)
+    if precision == "int8":
+        max_abs = float(np.abs(encodings).max()) if encodings.size else 0.0
+        scale = max_abs / 127.0 if max_abs > 0 else 1.0
+        return np.clip(np.round(encodings / scale), -127, 127).astype(np.int8), scale
+    return encodings.astype(PRECISIONS[precision][1]), 1.0
+
+
+def write_gallery(path, encodings, names, ids=None, precision="float32", sources=None, skipped_photos=None):
+    """
+    Write a packed gallery file (atomically, readers keep their old mapping)
+
+    Args:
+        path (str): Output .gallery file
+        encodings (list | ndarray): N x 128 face encodings
+        names (list): N names, parallel to encodings
+        ids (list): Optional N identity ids (default: 0..N-1)
+        precision (str): float32, float16 or int8
+        sources (list): Optional N [photo file name, mtime] or None (not from a photo)
+        skipped_photos (dict): Photo file name -> mtime of photos without a face
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"Presisi tidak dikenal: {precision}")
+
+    matrix, scale = quantize(encodings, precision)
+    names = [str(name) for name in names]
+    if len(names) != len(matrix):
+        raise ValueError("Jumlah nama dan encoding tidak sama")
+    ids = list(range(len(names))) if ids is None else [int(i) for i in ids]
+    sources = [None] * len(names) if sources is None else [list(source) if source else None for source in sources]
+    if len(sources) != len(names):
+        raise ValueError("Jumlah sumber dan encoding tidak sama")
+
+    table = json.dumps({"names": names, "ids": ids, "sources": sources, "skipped_photos": skipped_photos or {}},
+                       ensure_ascii=False).encode("utf-8")
+    names_offset = HEADER_SIZE + matrix.nbytes
+    header = struct.pack(HEADER_FORMAT, GALLERY_MAGIC, GALLERY_VERSION, PRECISIONS[precision][0],
+                         len(names), ENCODING_DIM, scale, names_offset, len(table))
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as file:
+        file.write(header.ljust(HEADER_SIZE, b"\0"))
+        file.write(matrix.tobytes())
+        file.write(table)
+    os.replace(tmp_path, path)
+
+
+class GalleryFile:
+    def __init__(self, path):
+        """
+        Open a packed gallery file read-only (memory mapped, zero copy)
+
+        Args:
+            path (str): Path to the .gallery file
+        """
+        self.path = path
+        with open(path, 'rb') as file:
+            header = file.read(HEADER_SIZE)
+            (magic, self.version, precision_code, self.count, dim,
+             self.scale, names_offset, names_length) = struct.unpack(HEADER_FORMAT, header[:struct.calcsize(HEADER_FORMAT)])
+            if magic != GALLERY_MAGIC:
+                raise ValueError(f"Bukan file galeri: {path}")
+            if self.version > GALLERY_VERSION:
+                raise ValueError(f"Versi galeri {self.version} tidak didukung (maks {GALLERY_VERSION})")
+            file.seek(names_offset)
+            table = json.loads(file.read(names_length).decode("utf-8"))
+
+        self.precision = PRECISION_NAMES[precision_code]
+        self.names = table["names"]
+        self.ids = table["ids"]
+        self.sources = table.get("sources")  # None for galleries written before sources were recorded
+        self.skipped_photos = table.get("skipped_photos", {})
+        dtype = PRECISIONS[self.precision][1]
+        if self.count:
+            self.encodings = np.memmap(path, dtype=dtype, mode='r', offset=HEADER_SIZE, shape=(self.count, dim))
+        else:
+            self.encodings = np.empty((0, dim), dtype=dtype)
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def nbytes(self):
+        return self.encodings.nbytes
+
+    def matrix(self):
+        """Return the encodings as float32 (zero copy for float32 galleries)"""
+        if self.precision == "float32":
+            return self.encodings
+        if self.precision == "int8":
+            return self.encodings.astype(np.float32) * np.float32(self.scale)
+        return self.encodings.astype(np.float32)
+
+    def face_distance(self, face_encoding, chunk_size=8192):
+        """
+        Euclidean distance from one encoding to every gallery entry
+
+        Works in chunks so reduced precision galleries are never expanded fully.
+        """
+        query = np.asarray(face_encoding, dtype=np.float32)
+        distances = np.empty(self.count, dtype=np.float32)
+        for start in range(0, self.count, chunk_size):
+            chunk = self.encodings[start:start + chunk_size].astype(np.float32)
+            if self.precision == "int8":
+                chunk *= np.float32(self.scale)
+            distances[start:start + chunk_size] = np.linalg.norm(chunk - query, axis=1)
+        return distances
+
+
+def _legacy_sources(names, photos, gallery_mtime):
+    """
+    Attribute the rows of a gallery written before sources were recorded
+
+    Such galleries were built from the folder, so the first row named after a
+    photo came from it. Photos newer than the gallery are marked for re-encoding.
+    """
+    stems = {os.path.splitext(photo)[0]: photo for photo in photos}
+    sources = [None] * len(names)
+    for index, name in enumerate(names):
+        photo = stems.pop(name, None)
+        if photo is not None:
+            sources[index] = [photo, photos[photo] if photos[photo] <= gallery_mtime else None]
+    return sources
+
+
+def _read_rows(gallery_path):
+    """
+    Rows of a gallery file as (float32 matrix, names, ids, sources, skipped photos, precision)
+
+    sources is None for a gallery written before sources were recorded.
+    """
+    if not os.path.exists(gallery_path):
+        return np.empty((0, ENCODING_DIM), dtype=np.float32), [], [], [], {}, None
+    gallery = GalleryFile(gallery_path)
+    return (np.array(gallery.matrix(), dtype=np.float32), list(gallery.names), list(gallery.ids),
+            gallery.sources, dict(gallery.skipped_photos), gallery.precision)
+
+
+def sync_gallery_with_folder(gallery_path="known_faces.gallery", folder_path="known_faces", precision="float32"):
+    """
+    Encode new or changed photos of the folder into the gallery
+
+    Only rows that came from a photo are replaced (photo changed) or dropped
+    (photo deleted). Rows enrolled in other ways are never touched.
+
+    Returns:
+        bool: True if the gallery file was rewritten
+    """
+    if not os.path.exists(folder_path):
+        print(f"📁 Folder {folder_path} tidak ditemukan, membuatnya...")
+        os.makedirs(folder_path)
+    photos = list_photos(folder_path)
+
+    matrix, names, ids, sources, skipped, _ = _read_rows(gallery_path)
+    legacy = sources is None
+    if legacy:
+        sources = _legacy_sources(names, photos, os.path.getmtime(gallery_path))
+
+    recorded = {}
+    for source in sources:
+        if source:
+            recorded.setdefault(source[0], source[1])
+    changed = [photo for photo, mtime in photos.items() if mtime not in (recorded.get(photo), skipped.get(photo))]
+    deleted = {photo for photo in recorded if photo not in photos}
+    removed = set(deleted)
+    skipped = {photo: mtime for photo, mtime in skipped.items() if photo in photos}
+    if not changed and not deleted and not legacy and os.path.exists(gallery_path):
+        return False
+
+    if changed:
+        print(f"🔄 {len(changed)} foto baru/berubah di {folder_path} di-encode ke galeri {gallery_path}...")
+    new_rows = []
+    for photo in changed:
+        try:
+            encoding = encode_photo(os.path.join(folder_path, photo))
+        except Exception as e:
+            print(f"❌ Error memuat {photo}: {e}")
+            continue
+        if encoding is None:
+            # Keep the rows of an earlier version of the photo, but do not retry it every start
+            print(f"⚠️  Tidak ada wajah ditemukan di: {photo}")
+            skipped[photo] = photos[photo]
+            continue
+        skipped.pop(photo, None)
+        removed.add(photo)
+        new_rows.append((os.path.splitext(photo)[0], encoding, [photo, photos[photo]]))
+        print(f"✅ Wajah dimuat: {os.path.splitext(photo)[0]} dari {photo}")
+
+    keep = [index for index, source in enumerate(sources) if not source or source[0] not in removed]
+    next_id = max(ids, default=-1) + 1
+    matrix = np.vstack([matrix[keep]] + [np.asarray(row[1], dtype=np.float32).reshape(1, ENCODING_DIM)
+                                         for row in new_rows])
+    write_gallery(gallery_path, matrix,
+                  [names[index] for index in keep] + [row[0] for row in new_rows],
+                  ids=[ids[index] for index in keep] + list(range(next_id, next_id + len(new_rows))),
+                  precision=precision,
+                  sources=[sources[index] for index in keep] + [row[2] for row in new_rows],
+                  skipped_photos=skipped)
+    print(f"📊 Galeri: {len(new_rows)} foto di-encode, {len(deleted)} foto dihapus, "
+          f"{len(keep) + len(new_rows)} wajah total")
+    return True
+
+
+def append_to_gallery(gallery_path, encodings, names, source=None, precision=None):
+    """
+    Append rows to a gallery file, keeping ids and sources of the existing rows
+
+    Args:
+        gallery_path (str): .gallery file (created if missing)
+        encodings (list | ndarray): Encodings to add
+        names (list): Names, parallel to encodings
+        source (list): [photo file name, mtime] the rows came from (a webcam
+            capture saved to known_faces/), rows of the same photo are replaced
+        precision (str): Stored precision (default: the file's own)
+    """
+    matrix, old_names, ids, sources, skipped, file_precision = _read_rows(gallery_path)
+    sources = sources if sources is not None else [None] * len(old_names)
+    keep = [index for index, old in enumerate(sources) if not (source and old and old[0] == source[0])]
+    added = np.asarray(encodings, dtype=np.float32).reshape(-1, ENCODING_DIM)
+    next_id = max(ids, default=-1) + 1
+    write_gallery(gallery_path, np.vstack([matrix[keep], added]),
+                  [old_names[index] for index in keep] + list(names),
+                  ids=[ids[index] for index in keep] + list(range(next_id, next_id + len(added))),
+                  precision=precision or file_precision or "float32",
+                  sources=[sources[index] for index in keep] + [source] * len(added),
+                  skipped_photos=skipped)
+
+
+def load_or_build_gallery(gallery_path="known_faces.gallery", folder_path="known_faces", precision="float32"):
+    """
+    Open the packed gallery after encoding new or changed photos of the folder into it
+
+    Returns:
+        tuple: (N x 128 float32 matrix, list of names)
+    """
+    sync_gallery_with_folder(gallery_path, folder_path, precision)
+
+    gallery = GalleryFile(gallery_path)
+    print(f"📂 Galeri dimuat: {gallery_path} ({len(gallery)} wajah, {gallery.precision}, {gallery.nbytes} byte)")
+    return gallery.matrix(), list(gallery.names)
+
+
+def pairwise_distances(queries, matrix):
+    """Euclidean distances between every query and every gallery row"""
+    squared = (np.sum(queries ** 2, axis=1)[:, np.newaxis]
+               + np.sum(matrix ** 2, axis=1)[np.newaxis, :]
+               - 2.0 * queries @ matrix.T)
+    return np.sqrt(np.maximum(squared, 0.0))
+
+
+def precision_report(encodings, names, tolerance=0.6, noise=0.03, max_queries=1000, seed=0):
+    """
+    Compare every precision against the original float64 encodings
+
+    Queries are (a sample of) the gallery encodings with small gaussian noise,
+    so each one has a known correct identity.
+
+    Returns:
+        list: One dict per precision with size and accuracy figures
+    """
+    reference = np.asarray(encodings, dtype=np.float64).reshape(-1, ENCODING_DIM)
+    if len(reference) == 0:
+        return []
+
+    rng = np.random.RandomState(seed)
+    sample = rng.choice(len(reference), size=min(max_queries, len(reference)), replace=False)
+    queries = reference[sample] + rng.normal(scale=noise, size=(len(sample), ENCODING_DIM))
+    ref_distances = pairwise_distances(queries, reference)
+    ref_best = ref_distances.argmin(axis=1)
+    ref_accept = ref_distances.min(axis=1) <= tolerance
+
+    results = []
+    for precision in PRECISIONS:
+        matrix, scale = quantize(reference, precision)
+        restored = matrix.astype(np.float64) * scale
+        distances = pairwise_distances(queries, restored)
+        best = distances.argmin(axis=1)
+        accept = distances.min(axis=1) <= tolerance
+
+        results.append({
+            "precision": precision,
+            "bytes_per_face": matrix.itemsize * ENCODING_DIM,
+            "matrix_bytes": int(matrix.nbytes),
+            "max_abs_error": float(np.abs(restored - reference).max()),
+            "mean_distance_error": float(np.abs(distances - ref_distances).mean()),
+            "top1_agreement": float(np.mean([names[a] == names[b] for a, b in zip(best, ref_best)])),
+            "decision_agreement": float(np.mean(accept == ref_accept)),
+        })
+    return results
+
+
+def print_precision_report(results):
+    """Print the accuracy-vs-size report"""
+    print("\n📏 AKURASI vs UKURAN GALERI:")
+    print("=" * 76)
+    print(f"{'Presisi':<8} {'Byte/wajah':>10} {'Total':>10} {'Max err':>9} {'Dist err':>9} {'Top-1':>8} {'Keputusan':>10}")
+    print("-" * 76)
+    for result in results:
+        print(f"{result['precision']:<8} {result['bytes_per_face']:>10} {result['matrix_bytes']:>10} "
+              f"{result['max_abs_error']:>9.5f} {result['mean_distance_error']:>9.5f} "
+              f"{result['top1_agreement']:>8.3f} {result['decision_agreement']:>10.3f}")
+    print("=" * 76)
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Tool untuk file galeri wajah (.gallery)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="Bangun / perbarui galeri dari folder known_faces")
+    build_parser.add_argument("folder")
+    build_parser.add_argument("output")
+    build_parser.add_argument("--precision", choices=list(PRECISIONS), default="float32")
+
+    info_parser = subparsers.add_parser("info", help="Tampilkan isi header galeri")
+    info_parser.add_argument("gallery")
+
+    report_parser = subparsers.add_parser("report", help="Laporan akurasi vs ukuran per presisi")
+    report_parser.add_argument("gallery")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        sync_gallery_with_folder(args.output, args.folder, args.precision)
+        print(f"✅ Galeri ditulis: {args.output} ({len(GalleryFile(args.output))} wajah, {args.precision})")
+    elif args.command == "info":
+        gallery = GalleryFile(args.gallery)
+        print(f"📂 {args.gallery}: versi {gallery.version}, {len(gallery)} wajah, "
+              f"presisi {gallery.precision}, {gallery.nbytes} byte")
+        print(f"📋 Nama: {', '.join(sorted(set(gallery.names)))}")
+        from_photos = sum(1 for source in gallery.sources or [] if source)
+        print(f"📷 Dari foto: {from_photos} baris, enroll lain: {len(gallery) - from_photos} baris")
+    elif args.command == "report":
+        gallery = GalleryFile(args.gallery)
+        print_precision_report(precision_report(gallery.matrix(), gallery.names))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""
+Match Client untuk Face Recognition System
+Sisi edge dari arsitektur edge/central: mengirim encoding 128-d ke match server
+dan menerima keputusan identitas. Snapshot galeri server disimpan lokal sebagai
+cache fallback, sehingga pintu tetap berfungsi saat server tidak terjangkau.
+
+Usage (uji edge + server sekaligus di localhost):
+    python match_client.py --selftest
+    python match_client.py http://127.0.0.1:8765
+"""
+
+import argparse
+import json
+import os
+import ssl
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import numpy as np
+
+from face_matcher import LinearMatcher
+from gallery_store import GalleryFile, write_gallery
+from match_server import decode_vectors, encode_vectors
+
+
+class RemoteMatcher:
+    def __init__(self, server_url, cache_path="edge_gallery_cache.gallery", timeout=0.5,
+                 retry_interval=10, refresh_interval=300, token=None, cafile=None):
+        """
+        Initialize the edge matcher
+
+        Args:
+            server_url (str): Base URL of the match server (e.g. https://10.0.0.5:8765)
+            cache_path (str): Local gallery snapshot used when the server is unreachable
+            timeout (float): HTTP timeout per request in seconds
+            retry_interval (float): Seconds to stay on the fallback cache after a failure
+            refresh_interval (float): Seconds between gallery snapshot refreshes
+            token (str): Shared secret of the match server
+            cafile (str): CA / self-signed certificate that signed the server's TLS certificate
+        """
+        self.server_url = server_url.rstrip("/")
+        self.token = token
+        self._ssl_context = ssl.create_default_context(cafile=cafile) if cafile else None
+        self.cache_path = cache_path
+        self.timeout = timeout
+        self.retry_interval = retry_interval
+        self.refresh_interval = refresh_interval
+
+        self.gallery_size = 0
+        self._cache_version = None
+        self._fallback = LinearMatcher(np.empty((0, 128), dtype=np.float32), [])
+        self._offline_until = 0.0
+        self._refresh_lock = threading.Lock()  # enroll() and the refresh thread share the cache files
+        self._stop_event = threading.Event()
+        self.stats = {"remote_calls": 0, "fallback_calls": 0, "errors": 0}
+
+        self._load_cache()
+        try:
+            self.gallery_size = self._request("GET", "/health")["gallery_size"]
+            print(f"🌐 Match server terhubung: {self.server_url} ({self.gallery_size} wajah)")
+        except Exception as e:
+            self._go_offline(e)
+
+        self._refresh_thread = threading.Thread(target=self._refresh_loop, name="gallery-refresh", daemon=True)
+        self._refresh_thread.start()
+
+    def __len__(self):
+        return self.gallery_size if self.is_online else len(self._fallback)
+
+    @property
+    def is_online(self):
+        return time.time() >= self._offline_until
+
+    @property
+    def names(self):
+        """Names of the last gallery snapshot (the server's gallery)"""
+        return self._fallback.names
+
+    def search_names(self, face_encodings):
+        """
+        Closest gallery name and distance for each encoding
+
+        Returns:
+            list: (name, distance) tuples, (None, None) for an empty gallery
+        """
+        if self.is_online:
+            try:
+                response = self._request("POST", "/match", {"encodings": encode_vectors(face_encodings)})
+                self.stats["remote_calls"] += 1
+                return [(result["closest"], result["distance"]) for result in response["results"]]
+            except Exception as e:
+                self._go_offline(e)
+
+        self.stats["fallback_calls"] += 1
+        return [self._fallback.best_name(encoding) for encoding in np.asarray(face_encodings).reshape(-1, 128)]
+
+    def best_name(self, face_encoding):
+        """Closest gallery name and distance for one encoding"""
+        return self.search_names([face_encoding])[0]
+
+    def enroll(self, name, encodings):
+        """Enroll a person on the server (the single source of truth)"""
+        try:
+            self._request("POST", "/enroll", {"name": name, "encodings": encode_vectors(encodings)})
+        except Exception as e:
+            print(f"❌ Enroll ke match server gagal: {e}")
+            return False
+
+        self.gallery_size += len(encodings)
+        try:
+            self.refresh_cache()
+        except Exception as e:
+            print(f"⚠️  Cache galeri edge belum diperbarui: {e}")
+        return True
+
+    def refresh_cache(self):
+        """Download the server gallery if it changed and store it as fallback cache"""
+        with self._refresh_lock:
+            path = "/gallery" if self._cache_version is None else f"/gallery?since={self._cache_version}"
+            snapshot = self._request("GET", path)
+            if snapshot is None:
+                return False  # Not modified
+
+            encodings = decode_vectors(snapshot["encodings"])
+            write_gallery(self.cache_path, encodings, snapshot["names"])
+            with open(self.cache_path + ".version", 'w', encoding='utf-8') as file:
+                file.write(str(snapshot["version"]))
+
+            self._cache_version = snapshot["version"]
+            self._fallback = LinearMatcher(encodings, snapshot["names"])
+            self.gallery_size = len(snapshot["names"])
+            print(f"💾 Cache galeri edge diperbarui: {self.gallery_size} wajah (versi {self._cache_version})")
+            return True
+
+    def close(self):
+        """Stop the background refresh"""
+        self._stop_event.set()
+
+    def _load_cache(self):
+        """Load the last gallery snapshot from disk"""
+        if not os.path.exists(self.cache_path):
+            return
+        try:
+            gallery = GalleryFile(self.cache_path)
+            self._fallback = LinearMatcher(gallery.matrix(), gallery.names)
+            if os.path.exists(self.cache_path + ".version"):
+                with open(self.cache_path + ".version", 'r', encoding='utf-8') as file:
+                    self._cache_version = int(file.read().strip())
+            print(f"📂 Cache galeri edge dimuat: {len(gallery)} wajah")
+        except Exception as e:
+            print(f"⚠️  Cache galeri edge tidak bisa dimuat: {e}")
+
+    def _refresh_loop(self):
+        """Keep the fallback cache in sync with the server"""
+        while not self._stop_event.is_set():
+            if self.is_online:
+                try:
+                    self.refresh_cache()
+                except Exception as e:
+                    self._go_offline(e)
+            self._stop_event.wait(self.refresh_interval)
+
+    def _go_offline(self, error):
+        """Switch to the local cache for retry_interval seconds"""
+        self.stats["errors"] += 1
+        if self.is_online:
+            print(f"⚠️  Match server tidak terjangkau ({error}) - memakai cache lokal")
+        self._offline_until = time.time() + self.retry_interval
+
+    def _request(self, method, path, payload=None):
+        """Send a JSON request, returns the decoded body (None for 304)"""
+        data = json.dumps(payload).encode("utf-8") if payload is not None else None
+        headers = {"Content-Type": "application/json"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        request = urllib.request.Request(self.server_url + path, data=data, method=method, headers=headers)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout, context=self._ssl_context) as response:
+                return json.loads(response.read().decode("utf-8"))
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                return None
+            raise
+
+
+def selftest():
+    """Run a match server and an edge client on localhost and check both paths"""
+    import tempfile
+    from match_server import MatchServer
+
+    work_dir = tempfile.mkdtemp(prefix="facerec_edge_")
+    rng = np.random.RandomState(0)
+    gallery = rng.normal(scale=0.09, size=(100, 128)).astype(np.float32)
+    names = [f"Person_{i}" for i in range(len(gallery))]
+    write_gallery(os.path.join(work_dir, "server.gallery"), gallery, names)
+
+    server = MatchServer(os.path.join(work_dir, "server.gallery"), os.path.join(work_dir, "known_faces"), port=0,
+                         token="selftest-token")
+    server.start()
+
+    intruder = RemoteMatcher(server.url, cache_path=os.path.join(work_dir, "intruder.gallery"), token="wrong")
+    print(f"1. Token salah ditolak: {not intruder.enroll('Intruder', [rng.normal(scale=0.09, size=128)])}")
+    intruder.close()
+
+    client = RemoteMatcher(server.url, cache_path=os.path.join(work_dir, "edge.gallery"), retry_interval=1,
+                           token="selftest-token")
+    query = gallery[42] + rng.normal(scale=0.005, size=128)
+
+    start = time.perf_counter()
+    print(f"2. Remote match: {client.best_name(query)} ({1000 * (time.perf_counter() - start):.1f} ms)")
+
+    client.enroll("New_Hire", [rng.normal(scale=0.09, size=128)])
+    print(f"3. Setelah enroll: galeri server {len(server.names)} wajah, cache edge {len(client._fallback)} wajah")
+
+    server.shutdown()
+    print(f"4. Server mati, fallback: {client.best_name(query)}")
+    print(f"📊 Stats: {client.stats}")
+    client.close()
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Client edge untuk match server")
+    parser.add_argument("server_url", nargs="?", help="URL match server")
+    parser.add_argument("--selftest", action="store_true", help="Jalankan server + client di localhost")
+    parser.add_argument("--token", default=os.environ.get("MATCH_SERVER_TOKEN"), help="Token match server")
+    parser.add_argument("--cafile", default=os.environ.get("MATCH_SERVER_CAFILE"), help="Sertifikat CA server (HTTPS)")
+    args = parser.parse_args()
+
+    if args.selftest or not args.server_url:
+        selftest()
+        return
+
+    client = RemoteMatcher(args.server_url, token=args.token, cafile=args.cafile)
+    print(f"📊 Galeri server: {len(client)} wajah, online: {client.is_online}")
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
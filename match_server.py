@@ -0,0 +1,307 @@
+"""
+Match Server untuk Face Recognition System
+Server pencocokan pusat untuk arsitektur edge/central: node edge (Raspberry Pi)
+hanya melakukan capture, deteksi dan encoding, lalu mengirim vektor 128-d
+(bukan gambar) ke server ini. Server memegang satu galeri untuk semua pintu
+sehingga pendaftaran wajah tidak lagi berbeda-beda antar device.
+
+API (JSON over HTTP/HTTPS, semua endpoint butuh header
+"Authorization: Bearer <token>" jika server dijalankan dengan token):
+    GET  /health                  -> status dan versi galeri
+    POST /match                   -> {"encodings": <base64 float32>, "tolerance": 0.6}
+    POST /enroll                  -> {"name": "...", "encodings": <base64 float32>}
+    GET  /gallery?since=<versi>   -> snapshot galeri untuk cache fallback edge
+
+Server menolak start di alamat selain loopback tanpa token: siapa pun di LAN
+bisa mendaftarkan encoding (membuka semua pintu) atau mengunduh semua template
+biometrik. Gunakan juga --certfile/--keyfile agar token dan encoding tidak
+dikirim sebagai plain text.
+
+Usage:
+    MATCH_SERVER_TOKEN=<rahasia> python match_server.py --host 0.0.0.0 --port 8765 \
+        --certfile server.crt --keyfile server.key --gallery known_faces.gallery
+"""
+
+import argparse
+import base64
+import hmac
+import ipaddress
+import json
+import os
+import ssl
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from face_matcher import create_matcher
+from gallery_store import append_to_gallery, load_or_build_gallery
+
+
+def encode_vectors(encodings):
+    """Pack N x 128 encodings as base64 float32 (512 bytes per face)"""
+    return base64.b64encode(np.asarray(encodings, dtype=np.float32).reshape(-1, 128).tobytes()).decode("ascii")
+
+
+def decode_vectors(data):
+    """Unpack base64 float32 encodings into an N x 128 array"""
+    return np.frombuffer(base64.b64decode(data), dtype=np.float32).reshape(-1, 128)
+
+
+def is_loopback_host(host):
+    """True if host only accepts connections from this machine"""
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def bearer_token_matches(token, header):
+    """Check an Authorization header against a shared token (anything passes without a token)"""
+    if not token:
+        return True
+    expected = f"Bearer {token}".encode("utf-8")
+    return hmac.compare_digest((header or "").encode("utf-8"), expected)
+
+
+def wrap_server_tls(httpd, certfile, keyfile=None):
+    """Serve an HTTP server over TLS, returns the URL scheme"""
+    if not certfile:
+        return "http"
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(certfile, keyfile)
+    httpd.socket = context.wrap_socket(httpd.socket, server_side=True)
+    return "https"
+
+
+class MatchServer:
+    def __init__(self, gallery_path="known_faces.gallery", folder_path="known_faces", host="127.0.0.1",
+                 port=8765, tolerance=0.6, num_workers=None, shard_threshold=20000, token=None,
+                 certfile=None, keyfile=None):
+        """
+        Initialize the central match server
+
+        Args:
+            gallery_path (str): Packed gallery file served by this node
+            folder_path (str): Photo folder used to (re)build the gallery
+            host (str): Interface to listen on
+            port (int): TCP port
+            tolerance (float): Default match tolerance
+            num_workers (int): Matcher worker processes for large galleries
+            shard_threshold (int): Gallery size from which the matcher is sharded
+            token (str): Shared secret required on every request (mandatory off loopback)
+            certfile (str): TLS certificate, serves HTTPS together with keyfile
+            keyfile (str): TLS private key
+        """
+        if not token and not is_loopback_host(host):
+            raise ValueError(f"Match server di {host} butuh token (--token / MATCH_SERVER_TOKEN)")
+
+        self.gallery_path = gallery_path
+        self.tolerance = tolerance
+        self.num_workers = num_workers
+        self.shard_threshold = shard_threshold
+        self.token = token
+
+        self._lock = threading.Lock()
+        self._matcher_users = {}  # matcher -> match calls still using it
+        self._matcher_released = threading.Condition()
+        self.encodings, self.names = load_or_build_gallery(gallery_path, folder_path)
+        self.encodings = np.asarray(self.encodings, dtype=np.float32)
+        self.version = self._gallery_version()
+        self.matcher = create_matcher(self.encodings, self.names, num_workers, shard_threshold)
+
+        self.httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self.scheme = wrap_server_tls(self.httpd, certfile, keyfile)
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"{self.scheme}://{host}:{port}"
+
+    def is_authorized(self, header):
+        """Check an Authorization header against the shared token"""
+        return bearer_token_matches(self.token, header)
+
+    def match(self, encodings, tolerance=None):
+        """Match encodings against the gallery and return identity decisions"""
+        tolerance = self.tolerance if tolerance is None else tolerance
+        matcher = self._acquire_matcher()
+        try:
+            results = []
+            for encoding in encodings:
+                name, distance = matcher.best_name(encoding)
+                matched = distance is not None and distance <= tolerance
+                results.append({
+                    "name": name if matched else "Unknown",
+                    "closest": name,
+                    "distance": distance,
+                    "matched": matched,
+                })
+        finally:
+            self._release_matcher(matcher)
+        return results
+
+    def _acquire_matcher(self):
+        """Current matcher, counted as in use until _release_matcher"""
+        with self._matcher_released:
+            matcher = self.matcher
+            self._matcher_users[matcher] = self._matcher_users.get(matcher, 0) + 1
+            return matcher
+
+    def _release_matcher(self, matcher):
+        with self._matcher_released:
+            self._matcher_users[matcher] -= 1
+            if not self._matcher_users[matcher]:
+                del self._matcher_users[matcher]
+                self._matcher_released.notify_all()
+
+    def _close_matcher(self, matcher):
+        """Close a replaced matcher once the match calls still using it finished"""
+        with self._matcher_released:
+            self._matcher_released.wait_for(lambda: matcher not in self._matcher_users)
+        matcher.close()
+
+    def enroll(self, name, encodings):
+        """Add encodings for a person, persist the gallery and swap in a new matcher"""
+        with self._lock:
+            encodings = np.asarray(encodings, dtype=np.float32).reshape(-1, 128)
+            self.encodings = np.vstack([self.encodings, encodings])
+            self.names = self.names + [name] * len(encodings)
+            # Enrolled rows have no photo, the gallery file is their only copy
+            append_to_gallery(self.gallery_path, encodings, [name] * len(encodings))
+            self.version = self._gallery_version()
+
+            old_matcher = self.matcher
+            new_matcher = create_matcher(self.encodings, self.names, self.num_workers, self.shard_threshold)
+            with self._matcher_released:
+                self.matcher = new_matcher
+            self._close_matcher(old_matcher)
+        print(f"✅ Enroll: {name} ({len(encodings)} encoding) - galeri {len(self.names)} wajah")
+
+    def _gallery_version(self):
+        """Gallery version, stable across server restarts (file modification time in ms)"""
+        return int(os.path.getmtime(self.gallery_path) * 1000)
+
+    def start(self):
+        """Serve in a background thread (used for localhost tests)"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="match-server", daemon=True)
+        self._thread.start()
+        print(f"🌐 Match server berjalan di {self.url} ({len(self.names)} wajah)")
+
+    def serve_forever(self):
+        """Serve in the current thread until interrupted"""
+        print(f"🌐 Match server berjalan di {self.url} ({len(self.names)} wajah)")
+        try:
+            self.httpd.serve_forever()
+        except KeyboardInterrupt:
+            print("🛑 Match server dihentikan")
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        """Stop serving and release the matcher"""
+        if self._thread is not None:
+            self.httpd.shutdown()
+            self._thread.join()
+            self._thread = None
+        self.httpd.server_close()
+        self._close_matcher(self.matcher)
+
+    def _make_handler(self):
+        server = self
+
+        class MatchRequestHandler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass  # Keep the console for match results, not access logs
+
+            def _send_json(self, status, payload):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _read_json(self):
+                length = int(self.headers.get("Content-Length", 0))
+                return json.loads(self.rfile.read(length).decode("utf-8"))
+
+            def _check_token(self):
+                if server.is_authorized(self.headers.get("Authorization")):
+                    return True
+                self._send_json(401, {"error": "unauthorized"})
+                return False
+
+            def do_GET(self):
+                if not self._check_token():
+                    return
+                parsed = urlparse(self.path)
+                if parsed.path == "/health":
+                    self._send_json(200, {"status": "ok", "gallery_size": len(server.names),
+                                          "gallery_version": server.version})
+                elif parsed.path == "/gallery":
+                    since = parse_qs(parsed.query).get("since", [None])[0]
+                    try:
+                        since = int(since) if since is not None else None
+                    except ValueError:
+                        self._send_json(400, {"error": f"invalid since: {since}"})
+                        return
+                    if since == server.version:
+                        self.send_response(304)
+                        self.end_headers()
+                        return
+                    self._send_json(200, {"version": server.version, "names": server.names,
+                                          "encodings": encode_vectors(server.encodings)})
+                else:
+                    self._send_json(404, {"error": "not found"})
+
+            def do_POST(self):
+                if not self._check_token():
+                    return
+                try:
+                    payload = self._read_json()
+                    if self.path == "/match":
+                        results = server.match(decode_vectors(payload["encodings"]), payload.get("tolerance"))
+                        self._send_json(200, {"results": results, "gallery_version": server.version})
+                    elif self.path == "/enroll":
+                        server.enroll(payload["name"], decode_vectors(payload["encodings"]))
+                        self._send_json(200, {"status": "ok", "gallery_version": server.version})
+                    else:
+                        self._send_json(404, {"error": "not found"})
+                except (KeyError, ValueError) as e:
+                    self._send_json(400, {"error": str(e)})
+
+        return MatchRequestHandler
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Server pencocokan wajah pusat")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--gallery", default="known_faces.gallery")
+    parser.add_argument("--folder", default="known_faces")
+    parser.add_argument("--tolerance", type=float, default=0.6)
+    parser.add_argument("--token", default=os.environ.get("MATCH_SERVER_TOKEN"),
+                        help="Token rahasia bersama (default: env MATCH_SERVER_TOKEN)")
+    parser.add_argument("--certfile", help="Sertifikat TLS (HTTPS)")
+    parser.add_argument("--keyfile", help="Private key TLS")
+    args = parser.parse_args()
+
+    try:
+        server = MatchServer(args.gallery, args.folder, args.host, args.port, args.tolerance,
+                             token=args.token, certfile=args.certfile, keyfile=args.keyfile)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return
+    if server.scheme == "http" and not is_loopback_host(args.host):
+        print("⚠️  Tanpa --certfile token dan encoding dikirim sebagai plain text di jaringan")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
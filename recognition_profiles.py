@@ -0,0 +1,243 @@
+"""
+Recognition Profiles untuk Face Recognition System
+Profil bernama yang menggabungkan parameter deteksi dan encoding yang
+sebelumnya tertanam di kode: skala frame, upsample HOG, jitter dan model
+landmark encoder, serta tolerance pencocokan.
+
+- pi-fast       : frame lebih kecil (skala 0.2), untuk pintu dengan wajah dekat
+- balanced      : nilai default lama facePI (skala 0.25, upsample 1, jitter 1, tolerance 0.6)
+- high-accuracy : frame lebih besar, model landmark besar, beberapa jitter, tolerance lebih ketat
+
+Profil dipilih saat start-up (RECOGNITION_PROFILE=pi-fast atau --profile) dan
+bisa diganti saat berjalan dengan tombol 'P'. Perintah autotune memutar ulang
+klip sampel lewat pipeline tiap profil dan memilih profil tercepat yang masih
+memenuhi target recall (dan identifikasi, jika nama orang di klip diberikan).
+
+Usage:
+    python recognition_profiles.py list
+    python recognition_profiles.py autotune clip.mp4 --target-recall 0.9
+    python recognition_profiles.py autotune clip.mp4 --expected-name Budi --target-identification 0.9 --json tune.json
+"""
+
+import argparse
+import json
+import os
+import time
+
+DEFAULT_PROFILE = "balanced"
+
+
+class RecognitionProfile:
+    """Detection / encoding / matching parameters used by the recognition loop"""
+
+    def __init__(self, name, scale, upsample, num_jitters, landmark_model, tolerance, description=""):
+        self.name = name
+        self.scale = scale
+        self.upsample = upsample
+        self.num_jitters = num_jitters
+        self.landmark_model = landmark_model
+        self.tolerance = tolerance
+        self.description = description
+
+    def detector_options(self, backend):
+        """Backend specific options for create_face_detector"""
+        return {"upsample": self.upsample} if backend == "hog" else {}
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "scale": self.scale,
+            "upsample": self.upsample,
+            "num_jitters": self.num_jitters,
+            "landmark_model": self.landmark_model,
+            "tolerance": self.tolerance,
+        }
+
+
+PROFILES = {
+    "pi-fast": RecognitionProfile("pi-fast", scale=0.2, upsample=1, num_jitters=1, landmark_model="small",
+                                  tolerance=0.6, description="Tercepat, wajah harus dekat ke kamera"),
+    "balanced": RecognitionProfile("balanced", scale=0.25, upsample=1, num_jitters=1, landmark_model="small",
+                                   tolerance=0.6, description="Default facePI"),
+    "high-accuracy": RecognitionProfile("high-accuracy", scale=0.5, upsample=1, num_jitters=3, landmark_model="large",
+                                        tolerance=0.55, description="Akurasi maksimal, butuh CPU lebih besar"),
+}
+
+
+def get_profile(name):
+    """Return a profile by name, falling back to the default profile"""
+    profile = PROFILES.get(name)
+    if profile is None:
+        print(f"⚠️  Profil tidak dikenal: {name} - menggunakan '{DEFAULT_PROFILE}'")
+        return PROFILES[DEFAULT_PROFILE]
+    return profile
+
+
+def next_profile(profile):
+    """The profile after the given one, for live cycling"""
+    names = list(PROFILES)
+    index = names.index(profile.name) if profile.name in names else -1
+    return PROFILES[names[(index + 1) % len(names)]]
+
+
+def _to_full_frame(boxes, scale):
+    return [tuple(int(round(v / scale)) for v in box) for box in boxes]
+
+
+def benchmark_profile(profile, frames, reference, backend="hog", matcher=None, expected_name=None):
+    """
+    Replay frames through detection + encoding (+ matching) with one profile
+
+    Args:
+        profile (RecognitionProfile): Profile under test
+        frames (list): (frame_index, BGR frame) tuples
+        reference (dict): frame_index -> full frame reference boxes
+        backend (str): Detector backend
+        matcher (LinearMatcher): Gallery matcher for the identification rate
+        expected_name (str): The person shown in the clip
+
+    Returns:
+        dict: Speed, recall and identification figures of the profile
+    """
+    import face_recognition
+    from face_detector import create_face_detector
+    from replay_benchmark import count_matches, prepare_frame, summarize_timings
+
+    detector = create_face_detector(backend, **profile.detector_options(backend))
+    timings = []
+    total_reference = total_matched = total_encoded = total_identified = 0
+
+    for index, frame in frames:
+        start = time.perf_counter()
+        rgb = prepare_frame(frame, profile.scale)
+        boxes = detector.detect(rgb)
+        encodings = face_recognition.face_encodings(rgb, boxes, num_jitters=profile.num_jitters,
+                                                    model=profile.landmark_model) if boxes else []
+        names = [matcher.best_name(encoding) for encoding in encodings] if matcher is not None else []
+        timings.append(time.perf_counter() - start)
+
+        ref = reference.get(index, [])
+        total_reference += len(ref)
+        total_matched += count_matches(_to_full_frame(boxes, profile.scale), ref)
+        total_encoded += len(encodings)
+        total_identified += sum(1 for name, distance in names
+                                if name == expected_name and distance is not None and distance <= profile.tolerance)
+
+    result = dict(profile.to_dict(), backend=detector.name, frames=len(timings), encoded_faces=total_encoded)
+    result.update(summarize_timings(timings))
+    result["fps"] = round(1000.0 / result["mean_ms"], 1) if result["mean_ms"] else 0.0
+    result["recall"] = round(total_matched / total_reference, 3) if total_reference else None
+    result["identification_rate"] = (round(total_identified / total_reference, 3)
+                                     if expected_name and total_reference else None)
+    return result
+
+
+def autotune(source, target_recall=0.9, target_identification=None, expected_name=None,
+             gallery_path="known_faces.gallery", annotations=None, backend="hog", max_frames=100, frame_step=1):
+    """
+    Benchmark every profile on a sample clip and pick the fastest one meeting the targets
+
+    Without annotations the reference boxes come from HOG with upsample=2 on
+    half resolution frames.
+
+    Returns:
+        tuple: (name of the chosen profile or None, list of result dicts)
+    """
+    from face_matcher import LinearMatcher
+    from gallery_store import GalleryFile
+    from replay_benchmark import load_annotations, load_frames, prepare_frame, reference_boxes
+
+    frames = load_frames(source, max_frames=max_frames, frame_step=frame_step)
+    if not frames:
+        print(f"❌ Tidak ada frame yang bisa dibaca dari: {source}")
+        return None, []
+    print(f"🎞️  {len(frames)} frame dimuat dari {source}")
+
+    if annotations:
+        reference = load_annotations(annotations, 1.0)
+    else:
+        reference_scale = 0.5
+        reference = reference_boxes([(index, prepare_frame(frame, reference_scale)) for index, frame in frames])
+        reference = {index: _to_full_frame(boxes, reference_scale) for index, boxes in reference.items()}
+
+    if not any(reference.values()):
+        print("⚠️  Tidak ada wajah referensi di klip - recall tidak bisa diukur")
+    if target_identification is not None and not expected_name:
+        print("⚠️  --target-identification butuh --expected-name - identifikasi tidak bisa diukur")
+
+    matcher = None
+    if expected_name:
+        gallery = GalleryFile(gallery_path)
+        matcher = LinearMatcher(gallery.matrix(), gallery.names)
+
+    results = []
+    for profile in PROFILES.values():
+        result = benchmark_profile(profile, frames, reference, backend, matcher, expected_name)
+        # A target that could not be measured (no reference faces, no expected name) is not met
+        result["meets_target"] = (result["recall"] is not None and result["recall"] >= target_recall and
+                                  (target_identification is None or
+                                   (result["identification_rate"] is not None and
+                                    result["identification_rate"] >= target_identification)))
+        results.append(result)
+        print(f"⚙️  {profile.name:<14} {result['mean_ms']:>8.1f} ms/frame  recall {result['recall']}  "
+              f"identifikasi {result['identification_rate']}  {'✅' if result['meets_target'] else '❌'}")
+
+    passing = [result for result in results if result["meets_target"]]
+    chosen = min(passing, key=lambda result: result["mean_ms"])["name"] if passing else None
+    return chosen, results
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Profil presisi/performa untuk pipeline pengenalan wajah")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("list", help="Tampilkan semua profil")
+
+    tune_parser = subparsers.add_parser("autotune", help="Pilih profil tercepat yang memenuhi target akurasi")
+    tune_parser.add_argument("source", help="File video atau folder gambar sampel")
+    tune_parser.add_argument("--target-recall", type=float, default=0.9)
+    tune_parser.add_argument("--target-identification", type=float, help="Target identifikasi (butuh --expected-name)")
+    tune_parser.add_argument("--expected-name", help="Nama orang di klip (harus ada di galeri)")
+    tune_parser.add_argument("--gallery", default="known_faces.gallery")
+    tune_parser.add_argument("--annotations", help="File JSON anotasi box wajah (resolusi penuh)")
+    tune_parser.add_argument("--backend", default=os.environ.get("FACE_DETECTOR", "hog"))
+    tune_parser.add_argument("--max-frames", type=int, default=100)
+    tune_parser.add_argument("--frame-step", type=int, default=1)
+    tune_parser.add_argument("--json", help="Simpan hasil ke file JSON")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        print("\n🎛️  PROFIL PENGENALAN:")
+        print("=" * 78)
+        for profile in PROFILES.values():
+            print(f"{profile.name:<14} skala {profile.scale:<5} upsample {profile.upsample}  jitter {profile.num_jitters}  "
+                  f"landmark {profile.landmark_model:<5}  tol {profile.tolerance:<5} {profile.description}")
+        print("=" * 78)
+        return
+
+    chosen, results = autotune(
+        args.source,
+        target_recall=args.target_recall,
+        target_identification=args.target_identification,
+        expected_name=args.expected_name,
+        gallery_path=args.gallery,
+        annotations=args.annotations,
+        backend=args.backend,
+        max_frames=args.max_frames,
+        frame_step=args.frame_step
+    )
+    if chosen:
+        print(f"\n🏆 Profil terpilih: {chosen}")
+        print(f"   Jalankan: RECOGNITION_PROFILE={chosen} python facePI.py")
+    else:
+        print("\n❌ Tidak ada profil yang memenuhi target - turunkan target atau gunakan klip lain")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump({"chosen": chosen, "results": results}, file, indent=2)
+        print(f"💾 Hasil disimpan ke: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+"""
+Replay Benchmark untuk Face Recognition System
+Memutar ulang klip video (atau folder gambar) melalui pipeline deteksi
+untuk mengukur kecepatan dan recall tiap backend detektor tanpa webcam.
+
+Usage:
+    python replay_benchmark.py clip.mp4
+    python replay_benchmark.py frames/ --backends hog,haar,yunet --json hasil.json
+    python replay_benchmark.py clip.mp4 --annotations clip_faces.json
+    python replay_benchmark.py clip.mp4 --match --gallery-size 50000 --workers 1,2,4
+
+File anotasi (opsional) berisi {"<frame_index>": [[top, right, bottom, left], ...]}
+dalam koordinat frame resolusi penuh. Tanpa anotasi, backend HOG dengan
+upsample=2 dipakai sebagai referensi recall.
+
+Mode --match mengukur matcher galeri: wajah dari klip di-encode sekali, lalu
+dicocokkan ke galeri (known_faces.gallery, ditambah encoding sintetis sampai
+--gallery-size) dengan jumlah worker yang berbeda.
+"""
+
+import argparse
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+from face_detector import available_backends, box_iou, create_face_detector
+from face_matcher import LinearMatcher, ShardedMatcher
+from gallery_store import GalleryFile
+
+IMAGE_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.bmp']
+
+
+def load_frames(source, max_frames=None, frame_step=1):
+    """
+    Load BGR frames from a video file or a folder of images
+
+    Args:
+        source (str): Video file path or image folder
+        max_frames (int): Maximum number of frames to load
+        frame_step (int): Keep every n-th frame
+
+    Returns:
+        list: (frame_index, frame) tuples
+    """
+    frames = []
+
+    if os.path.isdir(source):
+        files = sorted(f for f in os.listdir(source) if os.path.splitext(f)[1].lower() in IMAGE_EXTENSIONS)
+        for index, filename in enumerate(files):
+            if index % frame_step:
+                continue
+            frame = cv2.imread(os.path.join(source, filename))
+            if frame is not None:
+                frames.append((index, frame))
+            if max_frames and len(frames) >= max_frames:
+                break
+        return frames
+
+    capture = cv2.VideoCapture(source)
+    index = 0
+    while True:
+        ret, frame = capture.read()
+        if not ret or frame is None:
+            break
+        if index % frame_step == 0:
+            frames.append((index, frame))
+            if max_frames and len(frames) >= max_frames:
+                break
+        index += 1
+    capture.release()
+    return frames
+
+
+def prepare_frame(frame, scale):
+    """Resize a BGR frame and convert it to RGB, like the recognition loop does"""
+    small_frame = cv2.resize(frame, (0, 0), fx=scale, fy=scale)
+    return cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
+
+
+def count_matches(detected, reference, iou_threshold=0.5):
+    """Count reference boxes matched by a detected box (greedy, one-to-one)"""
+    matched = 0
+    used = set()
+    for ref_box in reference:
+        best_index, best_iou = None, iou_threshold
+        for i, box in enumerate(detected):
+            if i in used:
+                continue
+            iou = box_iou(box, ref_box)
+            if iou >= best_iou:
+                best_index, best_iou = i, iou
+        if best_index is not None:
+            used.add(best_index)
+            matched += 1
+    return matched
+
+
+def load_annotations(path, scale):
+    """Load full-resolution annotations and scale them to detection size"""
+    with open(path, 'r', encoding='utf-8') as file:
+        raw = json.load(file)
+    return {
+        int(index): [tuple(int(round(v * scale)) for v in box) for box in boxes]
+        for index, boxes in raw.items()
+    }
+
+
+def reference_boxes(rgb_frames):
+    """Build pseudo ground truth with the slow, high recall HOG setting"""
+    reference_detector = create_face_detector("hog", upsample=2)
+    return {index: reference_detector.detect(rgb) for index, rgb in rgb_frames}
+
+
+def benchmark_detector(detector, rgb_frames, reference, iou_threshold=0.5):
+    """
+    Run one detector over the replayed frames
+
+    Returns:
+        dict: Speed and recall figures for the detector
+    """
+    timings = []
+    total_reference = 0
+    total_matched = 0
+    total_detected = 0
+
+    for index, rgb in rgb_frames:
+        start = time.perf_counter()
+        boxes = detector.detect(rgb)
+        timings.append(time.perf_counter() - start)
+
+        ref = reference.get(index, [])
+        total_reference += len(ref)
+        total_detected += len(boxes)
+        total_matched += count_matches(boxes, ref, iou_threshold)
+
+    timings.sort()
+    mean_ms = 1000.0 * sum(timings) / len(timings) if timings else 0.0
+    p95_ms = 1000.0 * timings[int(0.95 * (len(timings) - 1))] if timings else 0.0
+
+    return {
+        "backend": detector.name,
+        "frames": len(timings),
+        "mean_ms": round(mean_ms, 2),
+        "p95_ms": round(p95_ms, 2),
+        "fps": round(1000.0 / mean_ms, 1) if mean_ms else 0.0,
+        "reference_faces": total_reference,
+        "detected_faces": total_detected,
+        "matched_faces": total_matched,
+        "recall": round(total_matched / total_reference, 3) if total_reference else None,
+    }
+
+
+def run_detector_benchmark(source, backends=None, scale=0.25, annotations=None, max_frames=None, frame_step=1):
+    """
+    Replay a clip through every requested detector backend
+
+    Returns:
+        list: One result dict per backend
+    """
+    frames = load_frames(source, max_frames=max_frames, frame_step=frame_step)
+    if not frames:
+        print(f"❌ Tidak ada frame yang bisa dibaca dari: {source}")
+        return []
+
+    print(f"🎞️  {len(frames)} frame dimuat dari {source}")
+    rgb_frames = [(index, prepare_frame(frame, scale)) for index, frame in frames]
+
+    if annotations:
+        reference = load_annotations(annotations, scale)
+        print(f"📋 Referensi recall: anotasi {annotations}")
+    else:
+        reference = reference_boxes(rgb_frames)
+        print("📋 Referensi recall: HOG upsample=2 (tanpa anotasi)")
+
+    results = []
+    for backend in backends or available_backends():
+        detector = create_face_detector(backend)
+        if detector.name != backend:
+            print(f"⏭️  Lewati backend '{backend}' (tidak tersedia)")
+            continue
+        results.append(benchmark_detector(detector, rgb_frames, reference))
+
+    return results
+
+
+def summarize_timings(timings):
+    """Mean and p95 of a list of durations, in milliseconds"""
+    timings = sorted(timings)
+    return {
+        "mean_ms": round(1000.0 * sum(timings) / len(timings), 3),
+        "p95_ms": round(1000.0 * timings[int(0.95 * (len(timings) - 1))], 3),
+    }
+
+
+def encode_replay_faces(rgb_frames, detector):
+    """Detect and encode every face of the replayed frames once"""
+    import face_recognition
+
+    encodings = []
+    for _, rgb in rgb_frames:
+        locations = detector.detect(rgb)
+        if locations:
+            encodings.extend(face_recognition.face_encodings(rgb, locations))
+    return np.array(encodings, dtype=np.float32).reshape(-1, 128)
+
+
+def pad_gallery(matrix, names, size, seed=0):
+    """Grow a gallery to `size` entries with synthetic encodings of similar spread"""
+    missing = size - len(matrix)
+    if missing <= 0:
+        return matrix, names
+    rng = np.random.RandomState(seed)
+    spread = float(matrix.std()) if len(matrix) else 0.09
+    center = matrix.mean(axis=0) if len(matrix) else np.zeros(128)
+    synthetic = (center + rng.normal(scale=spread, size=(missing, 128))).astype(np.float32)
+    return np.vstack([matrix, synthetic]), list(names) + [f"synthetic_{i}" for i in range(missing)]
+
+
+def run_matcher_benchmark(source, gallery_path="known_faces.gallery", gallery_size=50000, worker_counts=(1, 2, 4),
+                          scale=0.25, max_frames=None, frame_step=1, repeats=3):
+    """
+    Replay a clip and time gallery matching of its faces per worker count
+
+    Returns:
+        list: One result dict per worker count
+    """
+    frames = load_frames(source, max_frames=max_frames, frame_step=frame_step)
+    rgb_frames = [(index, prepare_frame(frame, scale)) for index, frame in frames]
+    queries = encode_replay_faces(rgb_frames, create_face_detector("hog"))
+    if len(queries) == 0:
+        print(f"❌ Tidak ada wajah di klip: {source}")
+        return []
+
+    if os.path.exists(gallery_path):
+        gallery = GalleryFile(gallery_path)
+        matrix, names = np.asarray(gallery.matrix()), gallery.names
+    else:
+        matrix, names = np.empty((0, 128), dtype=np.float32), []
+    matrix, names = pad_gallery(matrix, names, gallery_size)
+    print(f"🎞️  {len(queries)} wajah dari {len(frames)} frame, galeri {len(names)} wajah")
+
+    results = []
+    baseline_ms = None
+    for workers in worker_counts:
+        matcher = LinearMatcher(matrix, names) if workers <= 1 else ShardedMatcher(matrix, names, num_workers=workers)
+        try:
+            matcher.search(queries[:1])  # Warm-up
+            timings = []
+            for _ in range(repeats):
+                for query in queries:
+                    start = time.perf_counter()
+                    matcher.best_match(query)
+                    timings.append(time.perf_counter() - start)
+        finally:
+            matcher.close()
+
+        result = dict(summarize_timings(timings), workers=workers, gallery_size=len(names), queries=len(timings))
+        baseline_ms = baseline_ms or result["mean_ms"]
+        result["speedup"] = round(baseline_ms / result["mean_ms"], 2)
+        results.append(result)
+        print(f"⚙️  {workers} worker: {result['mean_ms']:.3f} ms/query (speedup {result['speedup']}x)")
+
+    return results
+
+
+def print_results(results):
+    """Print benchmark results as a table"""
+    print("\n📈 HASIL BENCHMARK DETEKTOR:")
+    print("=" * 64)
+    print(f"{'Backend':<8} {'Frames':>6} {'Mean ms':>9} {'P95 ms':>9} {'FPS':>7} {'Recall':>8} {'Faces':>7}")
+    print("-" * 64)
+    for result in results:
+        recall = f"{result['recall']:.3f}" if result['recall'] is not None else "N/A"
+        print(f"{result['backend']:<8} {result['frames']:>6} {result['mean_ms']:>9.2f} "
+              f"{result['p95_ms']:>9.2f} {result['fps']:>7.1f} {recall:>8} {result['detected_faces']:>7}")
+    print("=" * 64)
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Replay benchmark untuk backend detektor wajah")
+    parser.add_argument("source", help="File video atau folder gambar")
+    parser.add_argument("--backends", help="Daftar backend dipisah koma (default: semua yang tersedia)")
+    parser.add_argument("--scale", type=float, default=0.25, help="Skala frame untuk deteksi (default: 0.25)")
+    parser.add_argument("--annotations", help="File JSON anotasi box wajah")
+    parser.add_argument("--max-frames", type=int, help="Batas jumlah frame")
+    parser.add_argument("--frame-step", type=int, default=1, help="Ambil setiap n frame")
+    parser.add_argument("--json", help="Simpan hasil ke file JSON")
+    parser.add_argument("--match", action="store_true", help="Benchmark matcher galeri, bukan detektor")
+    parser.add_argument("--gallery", default="known_faces.gallery", help="File galeri untuk --match")
+    parser.add_argument("--gallery-size", type=int, default=50000, help="Ukuran galeri untuk --match")
+    parser.add_argument("--workers", default="1,2,4", help="Jumlah worker untuk --match, dipisah koma")
+    args = parser.parse_args()
+
+    if args.match:
+        results = run_matcher_benchmark(
+            args.source,
+            gallery_path=args.gallery,
+            gallery_size=args.gallery_size,
+            worker_counts=[int(w) for w in args.workers.split(",")],
+            scale=args.scale,
+            max_frames=args.max_frames,
+            frame_step=args.frame_step
+        )
+    else:
+        backends = args.backends.split(",") if args.backends else None
+        results = run_detector_benchmark(
+            args.source,
+            backends=backends,
+            scale=args.scale,
+            annotations=args.annotations,
+            max_frames=args.max_frames,
+            frame_step=args.frame_step
+        )
+        print_results(results)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
+        print(f"💾 Hasil disimpan ke: {args.json}")
+
+if __name__ == "__main__":
+    main()
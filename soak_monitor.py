@@ -0,0 +1,486 @@
+"""
+Soak Monitor untuk Face Recognition System
+Diagnostik untuk kiosk yang berjalan 24/7. Secara periodik mencatat RSS,
+alokasi terbesar (tracemalloc), jumlah thread, file handle yang terbuka,
+ukuran struktur data yang bisa tumbuh (gauge) dan latency per tahap pipeline
+(p95 / rata-rata sejak sampel sebelumnya). Sampel ditulis sebagai JSON lines ke
+file yang dirotasi, dan drift terhadap baseline (sampel setelah warm-up) yang
+melewati threshold ditandai - sebelum kiosk crash, bukan sesudahnya.
+
+Mode replay memutar ulang klip lewat pipeline asli (detektor, quality gate,
+encoder, tracker, matcher, dedup, unknown store, door controller) dengan jam
+simulasi yang dipercepat, sehingga traffic berhari-hari dipadatkan menjadi jam.
+
+Usage:
+    SOAK_MONITOR=1 python facePI.py
+    python soak_monitor.py replay clip.mp4 --hours 72 --compression 48
+    python soak_monitor.py replay clip.mp4 --hours 24 --compression 24 --visitor-rate 60 --log soak.jsonl
+"""
+
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+
+import numpy as np
+
+
+def _read_proc_status(field):
+    """Integer value of a /proc/self/status field (Linux only, None elsewhere)"""
+    try:
+        with open("/proc/self/status", 'r', encoding='utf-8') as file:
+            for line in file:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def read_rss_bytes():
+    """Resident set size of this process in bytes"""
+    rss_kb = _read_proc_status("VmRSS")
+    return rss_kb * 1024 if rss_kb is not None else None
+
+
+def count_open_fds():
+    """Number of open file descriptors of this process"""
+    try:
+        return len(os.listdir("/proc/self/fd"))
+    except OSError:
+        return None
+
+
+class SoakMonitor:
+    def __init__(self, log_path="soak_monitor.jsonl", interval=300, enabled=True, trace_allocations=True,
+                 top_allocators=10, max_bytes=5 * 1024 * 1024, backup_count=3, warmup_samples=1,
+                 rss_growth_mb=64, thread_growth=5, fd_growth=20, latency_factor=1.5, min_latency_ms=5.0,
+                 alloc_growth_mb=16, window_size=10000, clock=time.time):
+        """
+        Initialize the soak monitor
+
+        Args:
+            log_path (str): JSON lines file, rotated at max_bytes
+            interval (float): Seconds (of clock) between samples
+            enabled (bool): When False, record/tick do nothing
+            trace_allocations (bool): Run tracemalloc for top allocators (slows Python code down)
+            top_allocators (int): Allocation sites reported per sample
+            max_bytes (int): Log file size before rotation
+            backup_count (int): Rotated log files kept
+            warmup_samples (int): Samples skipped before the drift baseline is taken
+            rss_growth_mb (float): RSS growth over baseline that is flagged
+            thread_growth (int): Thread count growth over baseline that is flagged
+            fd_growth (int): Open file handle growth over baseline that is flagged
+            latency_factor (float): Stage p95 latency ratio over baseline that is flagged
+            min_latency_ms (float): Ignore latency drift smaller than this (noise)
+            alloc_growth_mb (float): Growth of one allocation site over baseline that is flagged
+            window_size (int): Latency values kept per stage between samples
+            clock (callable): Time source, replaceable for replay / soak runs
+        """
+        self.log_path = log_path
+        self.interval = interval
+        self.enabled = enabled
+        self.trace_allocations = trace_allocations
+        self.top_allocators = top_allocators
+        self.warmup_samples = warmup_samples
+        self.rss_growth_mb = rss_growth_mb
+        self.thread_growth = thread_growth
+        self.fd_growth = fd_growth
+        self.latency_factor = latency_factor
+        self.min_latency_ms = min_latency_ms
+        self.alloc_growth_mb = alloc_growth_mb
+        self.window_size = window_size
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._latencies = {}  # stage -> deque of seconds since the last sample
+        self._gauges = {}  # name -> callable returning a number
+        self._baseline = None
+        self._baseline_snapshot = None
+        self._started_at = None
+        self._next_sample_at = None
+        self._sample_count = 0
+        self._drift_counts = {}
+        self._first = None
+        self._last = None
+        self._last_latency = {}
+        self._peak_rss = 0
+
+        self._logger = None
+        if enabled:
+            self._logger = logging.getLogger(f"soak_monitor.{id(self)}")
+            self._logger.setLevel(logging.INFO)
+            self._logger.propagate = False
+            self._handler = RotatingFileHandler(log_path, maxBytes=max_bytes, backupCount=backup_count,
+                                                encoding="utf-8")
+            self._handler.setFormatter(logging.Formatter("%(message)s"))
+            self._logger.addHandler(self._handler)
+
+    def start(self):
+        """Start tracing allocations and schedule the first sample"""
+        if not self.enabled:
+            return
+        if self.trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self._started_at = self.clock()
+        self._next_sample_at = self._started_at
+        print(f"🩺 Soak monitor aktif - sampel tiap {self.interval} detik ke {self.log_path}")
+
+    def stop(self):
+        """Take a final sample and close the log file"""
+        if not self.enabled or self._started_at is None:
+            return
+        self.sample()
+        if self.trace_allocations and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self._logger.removeHandler(self._handler)
+        self._handler.close()
+        self._started_at = None
+
+    def add_gauge(self, name, func):
+        """Report func() in every sample (size of a cache, queue, store...)"""
+        self._gauges[name] = func
+
+    def record(self, stage, seconds):
+        """Record the duration of one pipeline stage"""
+        if not self.enabled:
+            return
+        with self._lock:
+            window = self._latencies.get(stage)
+            if window is None:
+                window = self._latencies[stage] = deque(maxlen=self.window_size)
+            window.append(seconds)
+
+    @contextmanager
+    def stage(self, name):
+        """Time the enclosed block as one pipeline stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def tick(self):
+        """Take a sample when the interval has passed (call once per frame)"""
+        now = self.clock()
+        if self._started_at is None or now < self._next_sample_at:
+            return None
+        while self._next_sample_at <= now:
+            self._next_sample_at += self.interval
+        return self.sample()
+
+    def sample(self):
+        """Collect, check and log one sample"""
+        with self._lock:
+            latencies, self._latencies = self._latencies, {}
+
+        now = self.clock()
+        sample = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "clock": round(now, 3),
+            "uptime_s": round(now - self._started_at, 1),
+            "rss_bytes": read_rss_bytes(),
+            "threads": threading.active_count(),
+            "os_threads": _read_proc_status("Threads"),
+            "open_fds": count_open_fds(),
+            "latency_ms": {},
+            "gauges": {},
+        }
+        for stage, window in latencies.items():
+            values = np.sort(np.fromiter(window, dtype=np.float64)) * 1000.0
+            sample["latency_ms"][stage] = {
+                "count": len(values),
+                "mean": round(float(values.mean()), 3),
+                "p95": round(float(values[int(0.95 * (len(values) - 1))]), 3),
+            }
+        for name, func in self._gauges.items():
+            try:
+                sample["gauges"][name] = func()
+            except Exception as e:
+                sample["gauges"][name] = f"error: {e}"
+
+        snapshot = None
+        if self.trace_allocations and tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot().filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            ])
+            current, peak = tracemalloc.get_traced_memory()
+            sample["traced_bytes"] = current
+            sample["top_allocators"] = [
+                {"site": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}", "bytes": stat.size,
+                 "count": stat.count}
+                for stat in snapshot.statistics("lineno")[:self.top_allocators]
+            ]
+
+        if self._sample_count == self.warmup_samples:
+            self._baseline = sample
+            self._baseline_snapshot = snapshot
+        sample["drift"] = self._check_drift(sample, snapshot) if self._baseline is not None else []
+        self._sample_count += 1
+
+        self._first = self._first or sample
+        self._last = sample
+        self._last_latency = sample["latency_ms"] or self._last_latency
+        self._peak_rss = max(self._peak_rss, sample["rss_bytes"] or 0)
+        for flag in sample["drift"]:
+            self._drift_counts[flag["kind"]] = self._drift_counts.get(flag["kind"], 0) + 1
+            print(f"⚠️  Soak drift: {flag['message']}")
+
+        self._logger.info(json.dumps(sample))
+        return sample
+
+    def report(self):
+        """Summary of the run so far"""
+        first, last = self._first or {}, self._last or {}
+        return {
+            "samples": self._sample_count,
+            "uptime_s": last.get("uptime_s"),
+            "rss_first_bytes": first.get("rss_bytes"),
+            "rss_last_bytes": last.get("rss_bytes"),
+            "rss_peak_bytes": self._peak_rss,
+            "threads_first": first.get("threads"),
+            "threads_last": last.get("threads"),
+            "open_fds_first": first.get("open_fds"),
+            "open_fds_last": last.get("open_fds"),
+            "latency_first_ms": first.get("latency_ms"),
+            "latency_last_ms": self._last_latency,
+            "drift_counts": dict(self._drift_counts),
+        }
+
+    def _check_drift(self, sample, snapshot):
+        """Compare a sample with the baseline, returns the drift flags"""
+        baseline = self._baseline
+        flags = []
+
+        def flag(kind, message):
+            flags.append({"kind": kind, "message": message})
+
+        if sample["rss_bytes"] and baseline["rss_bytes"]:
+            growth_mb = (sample["rss_bytes"] - baseline["rss_bytes"]) / 1e6
+            if growth_mb > self.rss_growth_mb:
+                flag("rss", f"RSS naik {growth_mb:.1f} MB dari baseline")
+        if sample["threads"] - baseline["threads"] > self.thread_growth:
+            flag("threads", f"Thread {baseline['threads']} -> {sample['threads']}")
+        if sample["open_fds"] is not None and baseline["open_fds"] is not None:
+            if sample["open_fds"] - baseline["open_fds"] > self.fd_growth:
+                flag("open_fds", f"File handle {baseline['open_fds']} -> {sample['open_fds']}")
+
+        for stage, stats in sample["latency_ms"].items():
+            reference = baseline["latency_ms"].get(stage)
+            if reference is None:
+                continue
+            if (stats["p95"] > reference["p95"] * self.latency_factor
+                    and stats["p95"] - reference["p95"] > self.min_latency_ms):
+                flag("latency", f"p95 {stage} {reference['p95']:.1f} -> {stats['p95']:.1f} ms")
+
+        if snapshot is not None and self._baseline_snapshot is not None:
+            growth = [stat for stat in snapshot.compare_to(self._baseline_snapshot, "lineno")[:self.top_allocators]
+                      if stat.size_diff > 0]
+            sample["top_growth"] = [
+                {"site": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}", "bytes_diff": stat.size_diff,
+                 "count_diff": stat.count_diff}
+                for stat in growth
+            ]
+            for stat in growth:
+                if stat.size_diff / 1e6 > self.alloc_growth_mb:
+                    flag("allocations", f"{stat.traceback[0].filename}:{stat.traceback[0].lineno} "
+                                        f"naik {stat.size_diff / 1e6:.1f} MB")
+        return flags
+
+
+def run_replay_soak(source, hours=24.0, compression=24.0, sample_minutes=10.0, visitor_rate=30.0,
+                    backend="hog", profile_name="balanced", gallery_path="known_faces.gallery",
+                    log_path="soak_monitor.jsonl", max_frames=300, trace_allocations=True, seed=0):
+    """
+    Loop a clip through the recognition pipeline on a compressed clock
+
+    Args:
+        source (str): Video file or image folder
+        hours (float): Simulated hours to run
+        compression (float): Simulated seconds per real second
+        sample_minutes (float): Simulated minutes between monitor samples
+        visitor_rate (float): Synthetic unknown visitors per simulated hour
+        backend (str): Face detector backend
+        profile_name (str): Recognition profile
+        gallery_path (str): Gallery matched against (empty gallery if missing)
+        log_path (str): Soak monitor log file
+        max_frames (int): Frames of the clip kept in memory and looped
+        trace_allocations (bool): Run tracemalloc
+        seed (int): Seed of the synthetic visitors
+
+    Returns:
+        dict: SoakMonitor.report() of the run
+    """
+    import tempfile
+
+    from csv_logger import CSVLogger
+    from door_controller import DoorController
+    from encoding_service import EncodingService
+    from event_dedup import EventDeduplicator
+    from face_detector import create_face_detector
+    from face_matcher import create_matcher
+    from face_quality import FaceQualityGate
+    from face_tracker import FaceTracker
+    from gallery_store import GalleryFile
+    from recognition_profiles import get_profile
+    from replay_benchmark import load_frames, prepare_frame
+    from unknown_faces import UnknownFaceStore
+
+    frames = load_frames(source, max_frames=max_frames)
+    if not frames:
+        print(f"❌ Tidak ada frame yang bisa dibaca dari: {source}")
+        return {}
+
+    # Simulated clock: compression simulated seconds pass per real second
+    real_start = time.perf_counter()
+    sim_start = time.time()
+
+    def sim_clock():
+        return sim_start + (time.perf_counter() - real_start) * compression
+
+    profile = get_profile(profile_name)
+    work_dir = tempfile.mkdtemp(prefix="facerec_soak_")
+    detector = create_face_detector(backend, **profile.detector_options(backend))
+    quality_gate = FaceQualityGate(landmark_model=profile.landmark_model)
+    encoding_service = EncodingService(max_wait_ms=0, num_jitters=profile.num_jitters, model=profile.landmark_model)
+    encoding_service.start()
+    tracker = FaceTracker()
+    deduplicator = EventDeduplicator(cooldown=30, clock=sim_clock)
+    unknown_store = UnknownFaceStore(os.path.join(work_dir, "unknown_faces"))
+    csv_log = CSVLogger(os.path.join(work_dir, "soak_logs.csv"))
+    # Unlock timers run as in production, but the relay is never driven
+    door = DoorController(lock_duration=5.0 / compression, simulate=True)
+
+    if os.path.exists(gallery_path):
+        gallery = GalleryFile(gallery_path)
+        matcher = create_matcher(gallery.matrix(), gallery.names)
+    else:
+        matcher = create_matcher(np.empty((0, 128), dtype=np.float32), [])
+
+    processed = 0
+    monitor = SoakMonitor(log_path, interval=sample_minutes * 60, trace_allocations=trace_allocations,
+                          clock=sim_clock)
+    monitor.add_gauge("dedup_active_keys", lambda: deduplicator.get_metrics()["active_keys"])
+    monitor.add_gauge("tracker_active_tracks", lambda: tracker.get_stats()["active_tracks"])
+    monitor.add_gauge("unknown_encodings", lambda: unknown_store.total_encodings)
+    monitor.add_gauge("unknown_clusters", lambda: len(unknown_store.clusters))
+    monitor.add_gauge("frames", lambda: processed)
+    monitor.start()
+
+    rng = np.random.RandomState(seed)
+    end_at = sim_start + hours * 3600
+    visitors_due = 0.0
+    last_visitor_check = sim_clock()
+    print(f"🧪 Soak replay: {hours} jam simulasi, kompresi {compression}x (~{hours * 60 / compression:.0f} menit nyata)")
+
+    try:
+        while sim_clock() < end_at:
+            index, frame = frames[processed % len(frames)]
+            frame_start = time.perf_counter()
+            with monitor.stage("detect"):
+                rgb = prepare_frame(frame, profile.scale)
+                boxes = detector.detect(rgb)
+            with monitor.stage("quality"):
+                accepted, qualities = quality_gate.filter(rgb, boxes, scale=profile.scale)
+            with monitor.stage("encode"):
+                encodings = (encoding_service.encode(rgb, accepted, landmarks=quality_gate.accepted_landmarks(qualities))
+                             if accepted else [])
+            with monitor.stage("match"):
+                for track, encoding in zip(tracker.update(accepted), encodings):
+                    if not tracker.needs_matching(track, encoding):
+                        continue
+                    name, distance = matcher.best_name(encoding)
+                    vote = name if distance is not None and distance <= profile.tolerance else "Unknown"
+                    if tracker.add_vote(track, vote, distance, encoding):
+                        if track.identity != "Unknown":
+                            if deduplicator.should_log(f"person:{track.identity}"):
+                                csv_log.log_detection(name=track.identity)
+                                door.unlock_door(track.identity)
+                        else:
+                            cluster_id = unknown_store.add(track.anchor_encoding)
+                            if deduplicator.should_log(f"unknown:{cluster_id}"):
+                                csv_log.log_detection(name="Unknown")
+
+            # Lobby traffic: strangers that never show up in the clip
+            now = sim_clock()
+            visitors_due += visitor_rate * (now - last_visitor_check) / 3600
+            last_visitor_check = now
+            while visitors_due >= 1.0:
+                visitor = rng.normal(scale=0.05, size=128)
+                cluster_id = unknown_store.add(visitor)
+                if deduplicator.should_log(f"unknown:{cluster_id}"):
+                    csv_log.log_detection(name="Unknown")
+                visitors_due -= 1.0
+
+            monitor.record("frame", time.perf_counter() - frame_start)
+            processed += 1
+            monitor.tick()
+    except KeyboardInterrupt:
+        print("🛑 Soak replay dihentikan")
+    finally:
+        monitor.stop()
+        encoding_service.stop()
+        matcher.close()
+        door.cleanup()
+
+    return monitor.report()
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Soak test dan diagnostik memori/latency jangka panjang")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    replay_parser = subparsers.add_parser("replay", help="Soak test dengan klip replay dan jam dipercepat")
+    replay_parser.add_argument("source", help="File video atau folder gambar")
+    replay_parser.add_argument("--hours", type=float, default=24.0, help="Jam simulasi")
+    replay_parser.add_argument("--compression", type=float, default=24.0, help="Detik simulasi per detik nyata")
+    replay_parser.add_argument("--sample-minutes", type=float, default=10.0, help="Menit simulasi antar sampel")
+    replay_parser.add_argument("--visitor-rate", type=float, default=30.0, help="Orang asing sintetis per jam simulasi")
+    replay_parser.add_argument("--backend", default=os.environ.get("FACE_DETECTOR", "hog"))
+    replay_parser.add_argument("--profile", default="balanced")
+    replay_parser.add_argument("--gallery", default="known_faces.gallery")
+    replay_parser.add_argument("--log", default="soak_monitor.jsonl", help="File log sampel (dirotasi)")
+    replay_parser.add_argument("--max-frames", type=int, default=300)
+    replay_parser.add_argument("--no-tracemalloc", action="store_true", help="Tanpa tracemalloc (lebih cepat)")
+    replay_parser.add_argument("--json", help="Simpan ringkasan ke file JSON")
+    args = parser.parse_args()
+
+    report = run_replay_soak(
+        args.source,
+        hours=args.hours,
+        compression=args.compression,
+        sample_minutes=args.sample_minutes,
+        visitor_rate=args.visitor_rate,
+        backend=args.backend,
+        profile_name=args.profile,
+        gallery_path=args.gallery,
+        log_path=args.log,
+        max_frames=args.max_frames,
+        trace_allocations=not args.no_tracemalloc
+    )
+
+    print("\n🩺 RINGKASAN SOAK:")
+    print("=" * 50)
+    for key, value in report.items():
+        print(f"{key}: {value}")
+    print("=" * 50)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+        print(f"💾 Ringkasan disimpan ke: {args.json}")
+
+    # Non-zero exit when drift was flagged, so the soak can gate a release
+    raise SystemExit(1 if report.get("drift_counts") else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Startup Module untuk Face Recognition System
+Menjalankan inisialisasi subsystem yang saling independen (kamera, galeri
+wajah, detektor, encoder, door/GPIO) secara paralel dan mencetak rincian
+waktu start-up, supaya pintu cepat bisa dioperasikan setelah reboot.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+
+def _timed_call(func, process_start):
+    """Run a task and return its result with start / end offsets"""
+    started_at = time.perf_counter() - process_start
+    result = func()
+    finished_at = time.perf_counter() - process_start
+    return result, started_at, finished_at
+
+
+def run_startup_tasks(tasks, process_start, max_workers=None):
+    """
+    Run start-up tasks concurrently
+
+    Args:
+        tasks (dict): Task name -> callable without arguments
+        process_start (float): time.perf_counter() value at process start
+        max_workers (int): Thread pool size (default: one thread per task)
+
+    Returns:
+        tuple: (results, timings) - results maps task name to the callable's
+            return value (None if it failed), timings maps task name to
+            (started_at, finished_at) seconds since process start
+    """
+    results = {}
+    timings = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(tasks), thread_name_prefix="startup") as executor:
+        futures = {executor.submit(_timed_call, func, process_start): name for name, func in tasks.items()}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                results[name], started_at, finished_at = future.result()
+                timings[name] = (started_at, finished_at)
+                print(f"✅ Startup: {name} siap ({finished_at - started_at:.2f} s)")
+            except Exception as e:
+                results[name] = None
+                print(f"❌ Startup: {name} gagal: {e}")
+
+    return results, timings
+
+
+def print_startup_report(timings, process_start, imports_done_at=None):
+    """Print the start-up timing breakdown"""
+    total = time.perf_counter() - process_start
+    serial = sum(finished - started for started, finished in timings.values())
+
+    print("\n⏱️  RINCIAN WAKTU START-UP:")
+    print("=" * 50)
+    if imports_done_at is not None:
+        print(f"{'imports':<12} {imports_done_at:>8.2f} s   siap pada {imports_done_at:>6.2f} s")
+    for name, (started, finished) in sorted(timings.items(), key=lambda item: item[1][1]):
+        print(f"{name:<12} {finished - started:>8.2f} s   siap pada {finished:>6.2f} s")
+    print("-" * 50)
+    print(f"Total start-up: {total:.2f} s (serial akan ~{serial + (imports_done_at or 0):.2f} s)")
+    print("=" * 50)
+    print()
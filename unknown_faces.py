@@ -0,0 +1,265 @@
+"""
+Unknown Faces Module untuk Face Recognition System
+Menyimpan encoding wajah tak dikenal ke disk dan mengelompokkannya secara
+incremental (online greedy clustering, jarak dihitung vektor dengan NumPy).
+Pengunjung yang sering datang bisa langsung didaftarkan dengan mempromosikan
+cluster-nya menjadi identitas bernama, memakai encoding yang sudah tersimpan
+tanpa encoding ulang.
+
+Struktur folder:
+    unknown_faces/
+    ├── store.npz           # encodings, cluster id, timestamp
+    ├── clusters.json       # metadata cluster (count, first/last seen, thumbnail)
+    └── cluster_<id>.jpg    # thumbnail wajah representatif per cluster
+"""
+
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+
+class UnknownFaceStore:
+    def __init__(self, store_dir="unknown_faces", cluster_threshold=0.5, max_encodings=2000,
+                 max_per_cluster=20, autosave_every=20):
+        """
+        Initialize the unknown face store
+
+        Args:
+            store_dir (str): Folder for the store files and thumbnails
+            cluster_threshold (float): Max distance to a cluster centroid to join it
+            max_encodings (int): Max encodings kept over all clusters
+            max_per_cluster (int): Max encodings kept per cluster (oldest replaced)
+            autosave_every (int): Save to disk after this many additions
+        """
+        self.store_dir = store_dir
+        self.cluster_threshold = cluster_threshold
+        self.max_encodings = max_encodings
+        self.max_per_cluster = max_per_cluster
+        self.autosave_every = autosave_every
+
+        self.clusters = {}  # cluster_id -> metadata dict
+        self._encodings = {}  # cluster_id -> list of (encoding, timestamp)
+        self._centroids = np.empty((0, 128), dtype=np.float32)
+        self._centroid_ids = []
+        self._next_cluster_id = 1
+        self._unsaved = 0
+
+        os.makedirs(self.store_dir, exist_ok=True)
+        self.load()
+
+    @property
+    def total_encodings(self):
+        return sum(len(items) for items in self._encodings.values())
+
+    def add(self, face_encoding, face_image=None, score=None):
+        """
+        Add an unknown encoding and assign it to a cluster
+
+        Args:
+            face_encoding (ndarray): 128-d face encoding
+            face_image (ndarray): Optional BGR crop of the face for the thumbnail
+            score (float): Thumbnail quality score (default: crop area)
+
+        Returns:
+            int: Cluster id the encoding was assigned to
+        """
+        encoding = np.asarray(face_encoding, dtype=np.float32)
+        now = time.time()
+
+        cluster_id = None
+        if self._centroid_ids:
+            distances = np.linalg.norm(self._centroids - encoding, axis=1)
+            best_index = int(np.argmin(distances))
+            if distances[best_index] <= self.cluster_threshold:
+                cluster_id = self._centroid_ids[best_index]
+
+        if cluster_id is None:
+            cluster_id = self._new_cluster(encoding, now)
+        else:
+            self._join_cluster(cluster_id, encoding, now)
+
+        if face_image is not None and face_image.size > 0:
+            if score is None:
+                score = float(face_image.shape[0] * face_image.shape[1])
+            self._update_thumbnail(cluster_id, face_image, score)
+
+        while self.total_encodings > self.max_encodings:
+            self._evict_stalest()
+
+        self._unsaved += 1
+        if self._unsaved >= self.autosave_every:
+            self.save()
+
+        return cluster_id
+
+    def list_clusters(self, min_count=1):
+        """Return cluster metadata sorted by how often the face was seen"""
+        clusters = [dict(meta, cluster_id=cid) for cid, meta in self.clusters.items() if meta["count"] >= min_count]
+        return sorted(clusters, key=lambda meta: meta["count"], reverse=True)
+
+    def get_encodings(self, cluster_id):
+        """Return the stored encodings of a cluster"""
+        return [encoding for encoding, _ in self._encodings.get(cluster_id, [])]
+
+    def promote_cluster(self, cluster_id, name, known_faces_dir="known_faces"):
+        """
+        Promote a cluster to a named identity
+
+        The stored encodings are returned for direct use in the gallery and the
+        thumbnail is copied to known_faces/<name>.jpg. An existing photo of that
+        name is never overwritten, the promotion is refused instead. The cluster
+        is removed.
+
+        Returns:
+            tuple: (the cluster's encodings, [file name, mtime] of the copied
+                thumbnail or None), ([], None) if the cluster was not promoted
+        """
+        if cluster_id not in self.clusters:
+            print(f"❌ Cluster {cluster_id} tidak ditemukan")
+            return [], None
+
+        photo_path = os.path.join(known_faces_dir, f"{name}.jpg")
+        if os.path.exists(photo_path):
+            print(f"❌ Foto {photo_path} sudah ada - gunakan nama lain")
+            return [], None
+
+        encodings = [encoding.astype(np.float64) for encoding in self.get_encodings(cluster_id)]
+        source = None
+        thumbnail = self.clusters[cluster_id].get("thumbnail")
+        if thumbnail and os.path.exists(os.path.join(self.store_dir, thumbnail)):
+            os.makedirs(known_faces_dir, exist_ok=True)
+            image = cv2.imread(os.path.join(self.store_dir, thumbnail))
+            if image is not None and cv2.imwrite(photo_path, image):
+                # Recorded as the rows' source, so the gallery sync does not encode the thumbnail again
+                source = [os.path.basename(photo_path), os.path.getmtime(photo_path)]
+
+        self._remove_cluster(cluster_id)
+        self.save()
+        print(f"✅ Cluster {cluster_id} dipromosikan menjadi '{name}' ({len(encodings)} encoding)")
+        return encodings, source
+
+    def save(self):
+        """Write encodings and cluster metadata to disk"""
+        try:
+            items = [(cid, encoding, ts) for cid, entries in self._encodings.items() for encoding, ts in entries]
+            encodings = np.array([item[1] for item in items], dtype=np.float32).reshape(-1, 128)
+            cluster_ids = np.array([item[0] for item in items], dtype=np.int32)
+            timestamps = np.array([item[2] for item in items], dtype=np.float64)
+
+            store_path = os.path.join(self.store_dir, "store.npz")
+            tmp_path = os.path.join(self.store_dir, "store.tmp.npz")
+            np.savez(tmp_path, encodings=encodings, cluster_ids=cluster_ids, timestamps=timestamps)
+            os.replace(tmp_path, store_path)
+
+            meta_path = os.path.join(self.store_dir, "clusters.json")
+            with open(meta_path + ".tmp", 'w', encoding='utf-8') as file:
+                json.dump({
+                    "next_cluster_id": self._next_cluster_id,
+                    "clusters": {str(cid): meta for cid, meta in self.clusters.items()}
+                }, file, indent=2)
+            os.replace(meta_path + ".tmp", meta_path)
+
+            self._unsaved = 0
+            return True
+
+        except Exception as e:
+            print(f"❌ Error menyimpan unknown face store: {e}")
+            return False
+
+    def load(self):
+        """Load encodings and cluster metadata from disk"""
+        store_path = os.path.join(self.store_dir, "store.npz")
+        meta_path = os.path.join(self.store_dir, "clusters.json")
+        if not os.path.exists(store_path) or not os.path.exists(meta_path):
+            return False
+
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as file:
+                meta = json.load(file)
+            self._next_cluster_id = meta["next_cluster_id"]
+            self.clusters = {int(cid): data for cid, data in meta["clusters"].items()}
+
+            data = np.load(store_path)
+            self._encodings = {cid: [] for cid in self.clusters}
+            for encoding, cid, ts in zip(data["encodings"], data["cluster_ids"], data["timestamps"]):
+                if int(cid) in self._encodings:
+                    self._encodings[int(cid)].append((encoding, float(ts)))
+
+            self._centroid_ids = list(self.clusters)
+            self._centroids = np.array([self.clusters[cid]["centroid"] for cid in self._centroid_ids],
+                                       dtype=np.float32).reshape(-1, 128)
+
+            print(f"📂 Unknown face store dimuat: {len(self.clusters)} cluster, {self.total_encodings} encoding")
+            return True
+
+        except Exception as e:
+            print(f"❌ Error memuat unknown face store: {e}")
+            return False
+
+    def _new_cluster(self, encoding, now):
+        """Start a new cluster with a single encoding"""
+        cluster_id = self._next_cluster_id
+        self._next_cluster_id += 1
+        self.clusters[cluster_id] = {
+            "count": 1,
+            "first_seen": now,
+            "last_seen": now,
+            "centroid": encoding.tolist(),
+            "thumbnail": None,
+            "thumbnail_score": 0.0,
+        }
+        self._encodings[cluster_id] = [(encoding, now)]
+        self._centroids = np.vstack([self._centroids, encoding[np.newaxis, :]])
+        self._centroid_ids.append(cluster_id)
+        return cluster_id
+
+    def _join_cluster(self, cluster_id, encoding, now):
+        """Add an encoding to a cluster and move its centroid (running mean)"""
+        meta = self.clusters[cluster_id]
+        meta["count"] += 1
+        meta["last_seen"] = now
+
+        index = self._centroid_ids.index(cluster_id)
+        weight = 1.0 / min(meta["count"], self.max_per_cluster)
+        self._centroids[index] += weight * (encoding - self._centroids[index])
+        meta["centroid"] = self._centroids[index].tolist()
+
+        entries = self._encodings[cluster_id]
+        entries.append((encoding, now))
+        if len(entries) > self.max_per_cluster:
+            entries.pop(0)
+
+    def _update_thumbnail(self, cluster_id, face_image, score):
+        """Keep the best scoring crop as the cluster's thumbnail"""
+        meta = self.clusters[cluster_id]
+        if meta["thumbnail"] and score <= meta["thumbnail_score"]:
+            return
+        filename = f"cluster_{cluster_id}.jpg"
+        if cv2.imwrite(os.path.join(self.store_dir, filename), face_image):
+            meta["thumbnail"] = filename
+            meta["thumbnail_score"] = score
+
+    def _evict_stalest(self):
+        """Drop the oldest encoding of the least recently seen cluster"""
+        cluster_id = min(self.clusters, key=lambda cid: self.clusters[cid]["last_seen"])
+        entries = self._encodings[cluster_id]
+        entries.pop(0)
+        if not entries:
+            self._remove_cluster(cluster_id)
+
+    def _remove_cluster(self, cluster_id):
+        """Remove a cluster, its encodings and its thumbnail"""
+        meta = self.clusters.pop(cluster_id)
+        self._encodings.pop(cluster_id, None)
+
+        index = self._centroid_ids.index(cluster_id)
+        self._centroids = np.delete(self._centroids, index, axis=0)
+        del self._centroid_ids[index]
+
+        if meta.get("thumbnail"):
+            thumbnail_path = os.path.join(self.store_dir, meta["thumbnail"])
+            if os.path.exists(thumbnail_path):
+                os.remove(thumbnail_path)